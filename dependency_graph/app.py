@@ -1,375 +1,42 @@
 import logging
 import os.path
-import random
-import fnmatch
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import partial
 
 from Qt import QtCore, QtWidgets, QtGui
-from pxr import Usd, Sdf, Ar
 
 import utils
+import cache
+import graph
+import walker
+import lod
+import cluster
+import search
+import layout
 from vendor.Nodz import nodz_main
 from . import text_view
 
-import re
 from pprint import pprint
 
 
-digitSearch = re.compile(r'\b\d+\b')
-
 reload(text_view)
+reload(cache)
+reload(graph)
+reload(walker)
+reload(lod)
+reload(cluster)
+reload(search)
+reload(layout)
 
 reload(nodz_main)
 
-logger = logging.getLogger('usd-dependency-graph')
-logger.setLevel(logging.DEBUG)
-if not len(logger.handlers):
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    logger.addHandler(ch)
-logger.propagate = False
-
-
-class DependencyWalker(object):
-    def __init__(self, usdfile):
-        self.usdfile = usdfile
-        self.stage = None
-        
-        logger.info('DependencyWalker'.center(40, '-'))
-        logger.info('loading usd file: {}'.format(self.usdfile))
-        self.nodes = {}
-        self.edges = []
-    
-    
-    def start(self):
-        self.nodes = {}
-        self.edges = []
-        self.init_edges = []
-        self.stage = None
-        
-        self.stage = Usd.Stage.Open(self.usdfile)
-        rootLayer = self.stage.GetRootLayer()
-        
-        info = {}
-        info['mute'] = False
-        info['online'] = os.path.isfile(self.usdfile)
-        info['path'] = self.usdfile
-        info['type'] = 'layer'
-        self.nodes[self.usdfile] = info
-        
-        self.walkStageLayers(rootLayer)
-        self.walkStagePrims(self.usdfile)
-        # raise RuntimeError("poo")
-    
-    
-    def walkStageLayers(self, layer, level=1):
-        """
-        Recursive function to loop through a layer's external references
-        
-        :param layer: SdfLayer
-        :param level: current recursion depth
-        """
-        
-        id = '-' * (level)
-        layer_path = layer.realPath
-        # print id, 'layer: ', layer_path
-        layer_basepath = os.path.dirname(layer_path)
-        # print id, 'references:'
-        # print 'refs', layer.GetExternalReferences()
-        count = 0
-        
-        for ref in layer.GetExternalReferences():
-            if not ref:
-                # sometimes a ref can be a zero length string. whyyyyyyyyy?
-                # seeing this in multiverse esper_room example
-                continue
-            
-            refpath = os.path.normpath(os.path.join(layer_basepath, ref))
-            # print id, refpath
-            # if self.stage.IsLayerMuted(ref):
-            #     print 'muted layer'
-            # print 'anon?', Sdf.Layer.IsAnonymousLayerIdentifier(ref)
-            
-            # if you wanna construct a full path yourself
-            # you can manually load a SdfLayer like this
-            sub_layer = Sdf.Layer.Find(refpath)
-            
-            # or you can use FindRelativeToLayer to do the dirty work
-            # seems to operate according to the composition rules (variants blah blah)
-            # ie, it *may* not return a layer if the stage is set to not load that layer
-            # sub_layer = Sdf.Layer.FindRelativeToLayer(layer, ref)
-            
-            online = True
-            if sub_layer:
-                child_count = self.walkStageLayers(sub_layer, level=level + 1)
-            if not os.path.isfile(refpath):
-                online = False
-                # print "NOT ONLINE", ref
-            
-            if not refpath in self.nodes:
-                count += 1
-                info = {}
-                info['mute'] = self.stage.IsLayerMuted(ref)
-                info['online'] = online
-                info['path'] = refpath
-                info['type'] = 'layer'
-                
-                self.nodes[refpath] = info
-            
-            if not [layer_path, refpath] in self.init_edges:
-                self.init_edges.append([layer_path, refpath])
-        
-        # print 'SUBLAYERS'
-        # print layer.subLayerPaths
-        for ref in layer.subLayerPaths:
-            if not ref:
-                # going to guard against zero length strings here too
-                continue
-            
-            refpath = os.path.normpath(os.path.join(layer_basepath, ref))
-            
-            # if self.stage.IsLayerMuted(ref):
-            #     print 'muted layer'
-            sub_layer = Sdf.Layer.Find(refpath)
-            online = True
-            if sub_layer:
-                child_count = self.walkStageLayers(sub_layer, level=level + 1)
-            if not os.path.isfile(refpath):
-                online = False
-                # print "NOT ONLINE", ref
-            
-            if not refpath in self.nodes:
-                count += 1
-                info = {}
-                info['mute'] = self.stage.IsLayerMuted(ref)
-                info['online'] = online
-                info['path'] = refpath
-                info['type'] = 'sublayer'
-                
-                self.nodes[refpath] = info
-            
-            if not [layer_path, refpath] in self.init_edges:
-                self.init_edges.append([layer_path, refpath])
-        
-        return count
-    
-    
-    def walkStagePrims(self, usdfile):
-        # print 'test'.center(40, '-')
-        stage = Usd.Stage.Open(usdfile)
-        
-        for prim in stage.TraverseAll():
-            # print(prim.GetPath())
-            
-            # from the docs:
-            """Return a list of PrimSpecs that provide opinions for this prim (i.e.
-            the prim's metadata fields, including composition metadata).
-             specs are ordered from strongest to weakest opinion."""
-            primStack = prim.GetPrimStack()
-            for spec in primStack:
-                if spec.hasPayloads:
-                    payloadList = spec.payloadList
-                    for itemlist in [payloadList.appendedItems, payloadList.explicitItems,
-                                     payloadList.addedItems,
-                                     payloadList.prependedItems, payloadList.orderedItems]:
-                        if itemlist:
-                            for payload in itemlist:
-                                payload_path = payload.assetPath
-                                
-                                # print payload, payload_path
-                                with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
-                                    resolver = Ar.GetResolver()
-                                    # we resolve the payload path relative to the primSpec layer path (layer.identifier)
-                                    # far more likely to be correct. i hope
-                                    resolvedpath = resolver.AnchorRelativePath(spec.layer.identifier, payload_path)
-                                    # print 'payload resolvedpath', resolvedpath
-                                    
-                                    info = {}
-                                    info['online'] = os.path.isfile(resolvedpath)
-                                    info['path'] = resolvedpath
-                                    info['type'] = 'payload'
-                                    
-                                    self.nodes[resolvedpath] = info
-                                    if spec.layer.identifier != resolvedpath:
-                                        if not [spec.layer.identifier, resolvedpath, 'payload'] in self.edges:
-                                            self.edges.append([spec.layer.identifier, resolvedpath, 'payload'])
-                
-                # the docs say there's a HasSpecializes method
-                # no, there is not. at least in this build of houdini 18.0.453
-                # if spec.HasSpecializes:
-                # let's just ignore specialize for the time being
-                """
-                specializesList = spec.specializesList
-                spec_paths = []
-                for itemlist in [specializesList.appendedItems, specializesList.explicitItems,
-                                 specializesList.addedItems,
-                                 specializesList.prependedItems, specializesList.orderedItems]:
-                    if itemlist:
-                        for specialize in itemlist:
-                            specialize_path = specialize.assetPath
-                            with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
-                                resolver = Ar.GetResolver()
-                                resolvedpath = resolver.AnchorRelativePath(spec.layer.identifier, specialize_path)
-                                spec_paths.append(resolvedpath)
-                                ret.append(resolvedpath)
-
-                if spec_paths:
-                    print 'specializesList', spec.specializesList
+from graph import DependencyGraph, LAYER_ARCS
+from cluster import CLUSTER_MODES
+from walker import DependencyWalker, WalkCancelled, WALK_MODES
 
-                """
-                
-                # references operate the same to payloads
-                if spec.hasReferences:
-                    reflist = spec.referenceList
-                    for itemlist in [reflist.appendedItems, reflist.explicitItems,
-                                     reflist.addedItems,
-                                     reflist.prependedItems, reflist.orderedItems]:
-                        if itemlist:
-                            for reference in itemlist:
-                                reference_path = reference.assetPath
-                                if reference_path:
-                                    # print reference_path
-                                    with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
-                                        resolver = Ar.GetResolver()
-                                        # we resolve the payload path relative to the primSpec layer path (layer.identifier)
-                                        # far more likely to be correct. i hope
-                                        resolvedpath = resolver.AnchorRelativePath(spec.layer.identifier,
-                                                                                   reference_path)
-                                        
-                                        info = {}
-                                        info['online'] = os.path.isfile(resolvedpath)
-                                        info['path'] = resolvedpath
-                                        info['type'] = 'reference'
-                                        
-                                        self.nodes[resolvedpath] = info
-                                        
-                                        if spec.layer.identifier != resolvedpath:
-                                            if not [spec.layer.identifier, resolvedpath, 'reference'] in self.edges:
-                                                self.edges.append([spec.layer.identifier, resolvedpath, 'reference'])
-                
-                if spec.variantSets:
-                    for varset in spec.variantSets:
-                        thisvarset = prim.GetVariantSet(varset.name)
-                        current_variant_name = thisvarset.GetVariantSelection()
-                        current_variant = varset.variants[current_variant_name]
-                        for variant_name in varset.variants.keys():
-                            variant = varset.variants[variant_name]
-                            
-                            # todo: put variant info onto layer
-                            
-                            # for key in variant.GetMetaDataInfoKeys():
-                            #     print key, variant.GetInfo(key)
-                            
-                            # variants that are linked to payloads
-                            # variants can have other mechanisms, but sometimes they're a payload
-                            payloads = variant.GetInfo('payload')
-                            for itemlist in [payloads.appendedItems, payloads.explicitItems, payloads.addedItems,
-                                             payloads.prependedItems, payloads.orderedItems]:
-                                for payload in itemlist:
-                                    pathToResolve = payload.assetPath
-                                    anchorPath = variant.layer.identifier
-                                    with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
-                                        resolver = Ar.GetResolver()
-                                        resolvedpath = resolver.AnchorRelativePath(anchorPath, pathToResolve)
-                                        if not [anchorPath, resolvedpath, 'payload'] in self.edges:
-                                            self.edges.append([anchorPath, resolvedpath, 'payload'])
-                
-                # def, over or class
-                # print 'GetSpecifier', spec.specifier
-                # component,
-                # print 'GetKind', spec.kind
-                # print '--'
-            
-            # clips - this seems to be the way to do things
-            # clips are not going to be picked up by the stage layers inspection stuff
-            # apparently they're expensive. whatever.
-            # no prim stack shennanigans for us
-            # gotta get a clip on each prim and then test it for paths?
-            clips = Usd.ClipsAPI(prim)
-            if clips.GetClipAssetPaths():
-                # print 'CLIPS'.center(30, '-')
-                # dict of clip info. full of everything
-                # key is the clip *name*
-                clip_dict = clips.GetClips()
-                # print clip_dict
-                
-                """
-                @todo: subframe handling
-                integer frames: path/basename.###.usd
-                subinteger frames: path/basename.##.##.usd.
-                
-                @todo: non-1 increments
-                """
-                # don't use resolved path in case either the first or last file is missing from disk
-                firstFile = str(clips.GetClipAssetPaths()[0].path)
-                lastFile = str(clips.GetClipAssetPaths()[-1].path)
-                firstFileNum = digitSearch.findall(firstFile)[-1]
-                lastFileNum = digitSearch.findall(lastFile)[-1]
-                digitRange = str(firstFileNum + '-' + lastFileNum)
-                nodeName = ''
-                
-                firstFileParts = firstFile.split(firstFileNum)
-                for i in range(len(firstFileParts) - 1):
-                    nodeName += str(firstFileParts[i])
-                
-                nodeName += digitRange
-                nodeName += firstFileParts[-1]
-                
-                allFilesFound = True
-                for path in clips.GetClipAssetPaths():
-                    if (path.resolvedPath == ''):
-                        allFilesFound = False
-                        break
-                
-                # TODO : make more efficient - looping over everything currently
-                # TODO: validate presence of all files in the clip seq. bg thread?
-                
-                # GetClipSets seems to be crashing this houdini build - clips.GetClipSets()
-                clip_sets = clips.GetClips().keys()
-                
-                # print 'GetClipManifestAssetPath', clips.GetClipManifestAssetPath().resolvedPath
-                # this is a good one - resolved asset paths too
-                for clipSet in clip_sets:
-                    for path in clips.GetClipAssetPaths(clipSet):
-                        # print path, type(path)
-                        # print path.resolvedPath
-                        pass
-                
-                # layer that hosts list clip
-                # but this is the MANIFEST path
-                # not really correct. it'll have to do for now.
-                layer = clips.GetClipManifestAssetPath().resolvedPath
-                
-                if not nodeName in self.nodes:
-                    info = {}
-                    info['online'] = allFilesFound
-                    info['path'] = nodeName
-                    info['type'] = 'clip'
-                    
-                    self.nodes[nodeName] = info
-                
-                if not [layer, nodeName, 'clip'] in self.edges:
-                    self.edges.append([layer, nodeName, 'clip'])
-        
-        # print 'end test'.center(40, '-')
-    
-    
-    def layerprops(self, layer):
-        print 'layer props'.center(40, '-')
-        
-        for prop in ['anonymous', 'colorConfiguration', 'colorManagementSystem', 'comment', 'customLayerData',
-                     'defaultPrim', 'dirty', 'documentation', 'empty', 'endTimeCode', 'expired', 'externalReferences',
-                     'fileExtension', 'framePrecision',
-                     'framesPerSecond', 'hasOwnedSubLayers', 'identifier', 'owner', 'permissionToEdit',
-                     'permissionToSave', 'pseudoRoot', 'realPath', 'repositoryPath', 'rootPrimOrder', 'rootPrims',
-                     'sessionOwner', 'startTimeCode', 'subLayerOffsets', 'subLayerPaths', 'timeCodesPerSecond',
-                     'version']:
-            print prop, getattr(layer, prop)
-        print ''.center(40, '-')
-        
-        defaultprim = layer.defaultPrim
-        if defaultprim:
-            print defaultprim, type(defaultprim)
+# handlers are set up in walker, which has to work without any of the gui
+logger = logging.getLogger('usd-dependency-graph')
 
 
 def find_node(node_coll, attr_name, attr_value):
@@ -386,11 +53,25 @@ def on_nodeMoved(nodeName, nodePos):
 
 
 class FindNodeWindow(QtWidgets.QDialog):
-    def __init__(self, nodz, parent=None):
+    # past this many the list isn't much use. keeps typing the first letter quick
+    MAX_RESULTS = 1000
+    
+    def __init__(self, nodz, index, parent=None):
+        """
+        :param nodz: the Nodz widget
+        :param index: search.SearchIndex of the scene nodes, kept up to date by the graph window
+        """
         self.nodz = nodz
+        self.index = index
         super(FindNodeWindow, self).__init__(parent)
         self.setWindowFlags(QtCore.Qt.Tool | QtCore.Qt.WindowStaysOnTopHint)
         
+        # wait for a pause in the typing before searching
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search)
+        
         self.build_ui()
     
     
@@ -398,25 +79,47 @@ class FindNodeWindow(QtWidgets.QDialog):
         search_text = self.searchTxt.text()
         
         self.foundNodeList.clear()
+        self.countLbl.setText('')
         if search_text == '':
             return
         
-        for x in sorted(self.nodz.scene().nodes):
-            if fnmatch.fnmatch(x.lower(), '*%s*' % search_text.lower()):
-                self.foundNodeList.addItem(QtWidgets.QListWidgetItem(x))
+        # nodes are named by their full path, and indexed by their label too
+        results = sorted(self.index.search(search_text))
+        scene_nodes = self.nodz.scene().nodes
+        self.foundNodeList.setUpdatesEnabled(False)
+        for x in results[:self.MAX_RESULTS]:
+            node = scene_nodes.get(x)
+            if node is None:
+                continue
+            item = QtWidgets.QListWidgetItem(getattr(node, 'label', x))
+            item.setData(QtCore.Qt.UserRole, x)
+            item.setToolTip(x)
+            self.foundNodeList.addItem(item)
+        self.foundNodeList.setUpdatesEnabled(True)
+        
+        if len(results) > self.MAX_RESULTS:
+            self.countLbl.setText('showing {} of {} nodes'.format(self.MAX_RESULTS, len(results)))
+        else:
+            self.countLbl.setText('{} nodes'.format(len(results)))
     
     
     def item_selected(self, *args):
         items = self.foundNodeList.selectedItems()
         if items:
-            sel = [x.text() for x in items]
+            sel = set(x.data(QtCore.Qt.UserRole) for x in items)
             
-            for x in self.nodz.scene().nodes:
-                node = self.nodz.scene().nodes[x]
-                if x in sel:
-                    node.setSelected(True)
-                else:
-                    node.setSelected(False)
+            # only touch the nodes whose selection actually changes. the scene's own selection is the one to
+            # diff against - nodes can be selected in the graph view in the meantime
+            scene = self.nodz.scene()
+            selected = set(getattr(item, 'name', None) for item in scene.selectedItems())
+            selected.discard(None)
+            scene_nodes = scene.nodes
+            for x in selected - sel:
+                if x in scene_nodes:
+                    scene_nodes[x].setSelected(False)
+            for x in sel - selected:
+                if x in scene_nodes:
+                    scene_nodes[x].setSelected(True)
             self.nodz._focus()
     
     
@@ -424,27 +127,97 @@ class FindNodeWindow(QtWidgets.QDialog):
         lay = QtWidgets.QVBoxLayout()
         self.setLayout(lay)
         self.searchTxt = QtWidgets.QLineEdit()
-        self.searchTxt.textChanged.connect(self.search)
+        self.searchTxt.textChanged.connect(lambda *args: self.search_timer.start())
         lay.addWidget(self.searchTxt)
         
         self.foundNodeList = QtWidgets.QListWidget()
         self.foundNodeList.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.foundNodeList.itemSelectionChanged.connect(self.item_selected)
         lay.addWidget(self.foundNodeList)
+        
+        self.countLbl = QtWidgets.QLabel()
+        lay.addWidget(self.countLbl)
+
+
+class WalkThread(QtCore.QThread):
+    """
+    Runs a DependencyWalker off the gui thread, so the window stays responsive and the walk can be cancelled.
+    progress gets (counts, new nodes, new edges) a few times a second while the walk is going,
+    done gets (walker, error message) at the end. the error message is None if it all went fine.
+    """
+    progress = QtCore.Signal(object, object, object)
+    done = QtCore.Signal(object, object)
+    
+    def __init__(self, walker, reload=False, paths=None, parent=None):
+        super(WalkThread, self).__init__(parent)
+        self.walker = walker
+        self.reload = reload
+        self.paths = paths
+        # signals emitted from this thread get queued over to the gui thread
+        walker.progress = self.progress.emit
+    
+    
+    def run(self):
+        try:
+            if self.paths:
+                self.walker.update(self.paths)
+            else:
+                self.walker.start(reload=self.reload)
+        except WalkCancelled:
+            logger.info('walk cancelled')
+            self.done.emit(self.walker, 'cancelled')
+            return
+        except Exception as e:
+            logger.exception('walk failed')
+            self.done.emit(self.walker, str(e))
+            return
+        self.done.emit(self.walker, None)
+    
+    
+    def cancel(self):
+        self.walker.cancel()
 
 
 class NodeGraphWindow(QtWidgets.QDialog):
+    # clip sequences are checked on a background thread. this gets the results back onto the gui thread
+    clipChecked = QtCore.Signal(str, object)
+    
     def __init__(self, usdfile=None, parent=None):
         self.usdfile = usdfile
         self.root_node = None
+        # the last walk, and what the scene was built from. lets reloads only touch what changed
+        self.walker = None
+        self.scene_nodes = OrderedDict()
+        self.scene_connections = OrderedDict()
+        # cluster path: member paths, for the clusters that have been expanded
+        self.expanded_clusters = {}
         
         super(NodeGraphWindow, self).__init__(parent)
         self.settings = QtCore.QSettings("chrisg", "usd-dependency-graph")
         
         self.nodz = None
+        # persistent per-layer arcs, so reloads only re-open layers that changed on disk
+        self.arc_cache = cache.ArcCache()
         
         self.find_win = None
+        # labels and paths of the scene nodes, for the find window
+        self.search_index = search.SearchIndex()
+        # watch mode. file change events come in bursts (editors write temp files, save twice...)
+        # so they're collected up and the re-walk happens once things go quiet
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.watch_timer = QtCore.QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(500)
+        self.watch_timer.timeout.connect(self.rewalk)
+        self.changed_paths = set()
+        # the WalkThread that's currently running, if any
+        self.walk_thread = None
+        # the scene's item index method while a streamed walk has it switched off
+        self.stream_index = None
+        
         self.build_ui()
+        self.clipChecked.connect(self.update_clip_node)
         if self.usdfile:
             self.load_file()
     
@@ -469,7 +242,7 @@ class NodeGraphWindow(QtWidgets.QDialog):
         
         self.reloadBtn = QtWidgets.QPushButton("Reload")
         self.reloadBtn.setShortcut('Ctrl+r')
-        self.reloadBtn.clicked.connect(self.load_file)
+        self.reloadBtn.clicked.connect(self.reload_file)
         self.toolbar_lay.addWidget(self.reloadBtn)
         
         self.findBtn = QtWidgets.QPushButton("Find...")
@@ -481,6 +254,49 @@ class NodeGraphWindow(QtWidgets.QDialog):
         self.layoutBtn.clicked.connect(self.layout_nodes)
         self.toolbar_lay.addWidget(self.layoutBtn)
         
+        # composed is exact, layers is fast
+        self.modeCombo = QtWidgets.QComboBox()
+        self.modeCombo.addItems(WALK_MODES)
+        self.modeCombo.setToolTip("composed: what the stage actually uses\nlayers: everything authored, no composition")
+        if self.settings.value("walk_mode") in WALK_MODES:
+            self.modeCombo.setCurrentIndex(WALK_MODES.index(self.settings.value("walk_mode")))
+        self.toolbar_lay.addWidget(self.modeCombo)
+        
+        # big graphs are a lot easier to read (and build) with the asset libraries collapsed
+        self.clusterCombo = QtWidgets.QComboBox()
+        self.clusterCombo.addItems(CLUSTER_MODES)
+        self.clusterCombo.setToolTip("Collapse nodes into clusters by directory, asset or arc type.\n"
+                                     "Right click a cluster to expand it")
+        if self.settings.value("cluster_mode") in CLUSTER_MODES:
+            self.clusterCombo.setCurrentIndex(CLUSTER_MODES.index(self.settings.value("cluster_mode")))
+        self.clusterCombo.currentIndexChanged.connect(self.cluster_mode_changed)
+        self.toolbar_lay.addWidget(self.clusterCombo)
+        
+        # how far down from the root to walk. the rest can be expanded node by node
+        self.depthSpin = QtWidgets.QSpinBox()
+        self.depthSpin.setRange(0, 99)
+        self.depthSpin.setPrefix("Depth ")
+        self.depthSpin.setSpecialValueText("Depth: all")
+        self.depthSpin.setToolTip("Only walk this many arcs down from the root.\n"
+                                  "Right click a node to expand it further")
+        if self.settings.value("max_depth") is not None:
+            self.depthSpin.setValue(int(self.settings.value("max_depth")))
+        self.toolbar_lay.addWidget(self.depthSpin)
+        
+        self.watchChk = QtWidgets.QCheckBox("Watch")
+        self.watchChk.setToolTip("Update the graph when any of its layers change on disk")
+        self.watchChk.setChecked(self.settings.value("watch") in (True, 'true'))
+        self.watchChk.toggled.connect(self.watch_toggled)
+        self.toolbar_lay.addWidget(self.watchChk)
+        
+        self.cancelBtn = QtWidgets.QPushButton("Cancel")
+        self.cancelBtn.setEnabled(False)
+        self.cancelBtn.clicked.connect(lambda: self.cancel_walk())
+        self.toolbar_lay.addWidget(self.cancelBtn)
+        
+        self.statusLbl = QtWidgets.QLabel()
+        self.toolbar_lay.addWidget(self.statusLbl)
+        
         toolbarspacer = QtWidgets.QSpacerItem(10, 10, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.toolbar_lay.addItem(toolbarspacer)
         
@@ -492,6 +308,9 @@ class NodeGraphWindow(QtWidgets.QDialog):
         # self.nodz.editEnabled = False
         lay.addWidget(self.nodz)
         self.nodz.initialize()
+        # cheap drawing when zoomed out, so big graphs stay usable
+        lod.install(nodz_main, self.nodz.config)
+        lod.optimize_view(self.nodz)
         self.nodz.signal_NodeMoved.connect(on_nodeMoved)
         self.nodz.signal_NodeContextMenuEvent.connect(self.node_context_menu)
     
@@ -500,7 +319,7 @@ class NodeGraphWindow(QtWidgets.QDialog):
         if self.find_win:
             self.find_win.close()
         
-        self.find_win = FindNodeWindow(self.nodz, parent=self)
+        self.find_win = FindNodeWindow(self.nodz, self.search_index, parent=self)
         self.find_win.show()
         self.find_win.activateWindow()
     
@@ -531,112 +350,594 @@ class NodeGraphWindow(QtWidgets.QDialog):
         menu.addAction("print path", partial(self.node_path, node))
         menu.addAction("View USD file...", partial(self.view_usdfile, node))
         
+        userdata = self.get_node_from_name(node).userData
+        path = userdata.get('path')
+        if userdata.get('expanded') is False:
+            menu.addSeparator()
+            menu.addAction("Expand", partial(self.expand_node, path))
+        
+        if cluster.is_cluster(path):
+            menu.addSeparator()
+            menu.addAction("Expand cluster", partial(self.expand_cluster, path))
+        else:
+            for cluster_path, members in self.expanded_clusters.items():
+                if path in members:
+                    menu.addSeparator()
+                    menu.addAction("Collapse cluster", partial(self.collapse_cluster, cluster_path))
+                    break
+        
         menu.exec_(event.globalPos())
     
     
+    def scene_name(self, path):
+        """
+        Scene nodes are keyed on the full path of the graph node, so two files with the same name
+        never end up as the same node. The file name is only used as the label, see scene_label
+        """
+        return path
+    
+    
+    def scene_label(self, path):
+        if cluster.is_cluster(path):
+            return cluster.cluster_label(path)
+        return os.path.basename(path)
+    
+    
+    def root_path(self):
+        """
+        :return: graph path of the root node
+        """
+        if self.walker:
+            return self.walker.root
+        return os.path.normpath(os.path.abspath(self.usdfile))
+    
+    
+    def max_depth(self):
+        """
+        :return: depth limit for the walk, or None to walk everything
+        """
+        return self.depthSpin.value() or None
+    
+    
+    def expand_node(self, path):
+        """
+        Walk the arcs of a node that the depth limited walk left unexpanded, and add them to the scene
+        """
+        if not self.walker or self.walk_thread:
+            return
+        self.walker.expand(path)
+        self.refresh_scene()
+        if self.watchChk.isChecked():
+            self.watch_paths()
+    
+    
+    def cluster_mode_changed(self, *args):
+        self.settings.setValue("cluster_mode", self.clusterCombo.currentText())
+        self.expanded_clusters = {}
+        self.refresh_scene()
+    
+    
+    def expand_cluster(self, path):
+        node = self.nodz.scene().nodes.get(self.scene_name(path))
+        if not node:
+            return
+        self.expanded_clusters[path] = set(node.userData['members'])
+        self.refresh_scene()
+    
+    
+    def collapse_cluster(self, path):
+        self.expanded_clusters.pop(path, None)
+        self.refresh_scene()
+    
+    
+    def refresh_scene(self):
+        """
+        Bring the scene up to date with the current walk, eg after clusters have been expanded or collapsed.
+        Only the nodes going in or out of clusters get touched.
+        """
+        if not self.walker or self.walk_thread:
+            # the scene gets updated when the walk is done anyway
+            return
+        with self.bulk_scene_update():
+            self.update_scene(self.walker.graph)
+    
+    
+    def node_preset(self, info):
+        # node colouring / etc based on the node type
+        node_preset = 'node_default'
+        if info.get("type") == 'clip':
+            node_preset = 'node_clip'
+        elif info.get("type") == 'payload':
+            node_preset = 'node_payload'
+        elif info.get("type") == 'variant':
+            node_preset = 'node_variant'
+        elif info.get("type") == 'specialize':
+            node_preset = 'node_specialize'
+        elif info.get("type") == 'reference':
+            node_preset = 'node_reference'
+        elif info.get("type") == 'cluster':
+            node_preset = 'node_cluster'
+        return node_preset
+    
+    
+    def scene_state(self, graph):
+        """
+        Work out what the scene should show for a graph, without touching the scene.
+        
+        :param graph: DependencyGraph
+        :return: (OrderedDict of node name: info,
+                  OrderedDict of (plug node name, socket node name, socket name): None)
+        """
+        # only the clusters are built, not all the nodes inside them
+        graph = cluster.cluster_graph(graph, self.clusterCombo.currentText(), self.root_path(),
+                                      expanded=self.expanded_clusters)
+        
+        # everything here is one pass over the nodes and one over the edges. graphs get big
+        names = {}
+        nodes = OrderedDict()
+        for path, info in graph.nodes():
+            node_name = self.scene_name(path)
+            names[path] = node_name
+            if not node_name in nodes:
+                nodes[node_name] = info
+        
+        # create all the node connections
+        # the layer arcs are only used for the loose nodes below
+        connections = OrderedDict()
+        plugged = set()
+        # node name: name of the first layer that pulls it in
+        layer_parents = {}
+        for start_path, end_path, port_type in graph.edges():
+            start = names.get(start_path)
+            end = names.get(end_path)
+            if start is None or end is None:
+                # arc to a path that isn't a node. eg a clip manifest
+                continue
+            if port_type in LAYER_ARCS:
+                layer_parents.setdefault(end, start)
+                continue
+            connections[(end, start, port_type)] = None
+            plugged.add(end)
+        
+        # any nodes that don't have output connections
+        # ie, loose nodes
+        # use the layer traversal connections
+        root_name = self.scene_name(self.root_path())
+        for node_name in nodes:
+            if node_name in plugged or node_name == root_name:
+                # skip the root node - it's never gonna have an out connection
+                continue
+            
+            end = layer_parents.get(node_name)
+            if end is not None:
+                connections[(node_name, end, 'sublayer')] = None
+        
+        return nodes, connections
+    
+    
+    @contextmanager
+    def bulk_scene_update(self):
+        """
+        Put lots of items into the scene in one go.
+        Repaints are held off until the end, and the scene's bsp index is switched off while
+        the items go in - otherwise every single node and connection gets indexed and drawn as it's added.
+        """
+        scene = self.nodz.scene()
+        index_method = scene.itemIndexMethod()
+        scene.setItemIndexMethod(QtWidgets.QGraphicsScene.NoIndex)
+        self.nodz.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            # rebuilds the index once, for everything
+            scene.setItemIndexMethod(index_method)
+            self.nodz.setUpdatesEnabled(True)
+            self.nodz.viewport().update()
+    
+    
+    def pause_scene_index(self):
+        """
+        Switch the scene's bsp index off for a whole streamed walk. Putting it back rebuilds it from scratch,
+        so doing that for every batch would get slower and slower as the scene fills up.
+        """
+        scene = self.nodz.scene()
+        if self.stream_index is None:
+            self.stream_index = scene.itemIndexMethod()
+        scene.setItemIndexMethod(QtWidgets.QGraphicsScene.NoIndex)
+    
+    
+    def resume_scene_index(self):
+        """
+        Put back the index pause_scene_index switched off, once the walk is over
+        """
+        if self.stream_index is None:
+            return
+        self.nodz.scene().setItemIndexMethod(self.stream_index)
+        self.stream_index = None
+    
+    
+    def create_scene_node(self, node_name, info, pos):
+        nodeA = self.nodz.createNode(name=node_name, preset=self.node_preset(info), position=pos)
+        if not nodeA:
+            return None
+        if self.scene_name(self.root_path()) == node_name:
+            self.root_node = nodeA
+        # drawn instead of the name. see lod.py
+        nodeA.label = self.scene_label(info['path'])
+        nodeA.setToolTip(info['path'])
+        self.search_index.add(node_name, nodeA.label, info['path'])
+        
+        self.nodz.createAttribute(node=nodeA, name='out', index=0, preset='attr_preset_1',
+                                  plug=True, socket=False, dataType=int, socketMaxConnections=-1)
+        
+        nodeA.userData = info
+        lod.cache_item(nodeA)
+        
+        self.add_info_attributes(nodeA, info)
+        return nodeA
+    
+    
+    def add_info_attributes(self, node, info):
+        """
+        The attribute rows that show a node's info. offline markers and cluster sizes
+        """
+        if info['online'] is False:
+            self.nodz.createAttribute(node=node, name='OFFLINE', index=0, preset='attr_preset_2',
+                                      plug=False, socket=False)
+        if info.get('type') == 'cluster':
+            self.nodz.createAttribute(node=node, name='{} files'.format(info['count']), index=-1,
+                                      preset='attr_preset_3', plug=False, socket=False)
+        if info.get('expanded') is False:
+            # not walked yet. right click to expand
+            self.nodz.createAttribute(node=node, name='+ expand', index=-1, preset='attr_preset_3',
+                                      plug=False, socket=False)
+    
+    
+    def restyle_scene_node(self, node, info):
+        """
+        Bring an existing node in line with its new info, leaving its position and connections alone
+        """
+        node.userData = info
+        
+        node_preset = self.node_preset(info)
+        if node.nodePreset != node_preset:
+            node.nodePreset = node_preset
+            node._createStyle(self.nodz.config)
+        
+        # offline markers, including the ones the clip checks add, and cluster sizes
+        for attr in reversed(list(node.attrs)):
+            if attr in ('OFFLINE', '+ expand') or attr.endswith(' missing') or attr.endswith(' files'):
+                self.nodz.deleteAttribute(node, node.attrs.index(attr))
+        self.add_info_attributes(node, info)
+        node.update()
+    
+    
+    def create_scene_connection(self, plug_name, socket_name, port_type):
+        socket_node = self.nodz.scene().nodes[socket_name]
+        if not port_type in socket_node.attrs:
+            self.nodz.createAttribute(node=socket_node, name=port_type, index=-1, preset='attr_preset_1',
+                                      plug=False, socket=True, dataType=int, socketMaxConnections=-1)
+        
+        self.nodz.createConnection(plug_name, 'out', socket_name, port_type)
+    
+    
+    def delete_scene_connection(self, plug_name, socket_name, port_type):
+        plug_node = self.nodz.scene().nodes.get(plug_name)
+        if not plug_node:
+            return
+        for connection in list(plug_node.plugs['out'].connections):
+            if connection.socketNode == socket_name and connection.socketAttr == port_type:
+                connection._remove()
+    
+    
     def load_file(self):
         
         if not os.path.isfile(self.usdfile):
             raise RuntimeError("Cannot find file: %s" % self.usdfile)
         
+        # whatever was walking before is for a different file or mode now
+        self.cancel_walk(wait=True)
+        
         self.nodz.clearGraph()
+        self.search_index.clear()
         self.root_node = None
+        self.scene_nodes = OrderedDict()
+        self.scene_connections = OrderedDict()
+        self.expanded_clusters = {}
         self.setWindowTitle(self.usdfile)
         
-        x = DependencyWalker(self.usdfile)
-        x.start()
+        # let go of the last stage first, otherwise its layers get picked up again as they were
+        self.walker = None
+        x = DependencyWalker(self.usdfile, mode=self.modeCombo.currentText(), cache=self.arc_cache,
+                             max_depth=self.max_depth())
+        self.walker = x
+        self.start_walk(x, reload=False)
+    
+    
+    def reload_file(self):
+        """
+        Walk the file again and only touch the parts of the scene that changed.
+        Unchanged layers come out of the arc cache (and in composed mode the stage only reloads the
+        layers that changed on disk). Nodes that are still there keep their position and selection.
+        """
+        if self.walk_thread:
+            # already on it
+            return
+        if not self.walker or self.walker.usdfile != self.usdfile or self.walker.mode != self.modeCombo.currentText():
+            self.load_file()
+            return
+        if self.walker.max_depth != self.max_depth():
+            self.load_file()
+            return
+        
+        if not os.path.isfile(self.usdfile):
+            raise RuntimeError("Cannot find file: %s" % self.usdfile)
         
-        nodz_scene = self.nodz.scene()
-        rect = nodz_scene.sceneRect()
+        self.start_walk(self.walker, reload=True)
+    
+    
+    def start_walk(self, walker, reload=False, paths=None):
+        """
+        Run a walk on a WalkThread. A fresh walk streams its nodes into the scene as they're found,
+        a reload gets diffed against the scene once it's done.
+        
+        :param walker: DependencyWalker
+        :param reload: reuse the walker's stage, see DependencyWalker.start
+        :param paths: layers mode reload. only re-read these changed layers, see DependencyWalker.update
+        """
+        thread = WalkThread(walker, reload=reload, paths=paths, parent=self)
+        if not reload:
+            self.pause_scene_index()
+            thread.progress.connect(self.walk_progress)
+        else:
+            thread.progress.connect(self.walk_status)
+        thread.done.connect(self.walk_done)
+        thread.finished.connect(thread.deleteLater)
+        self.walk_thread = thread
+        
+        self.cancelBtn.setEnabled(True)
+        self.statusLbl.setText('opening...')
+        thread.start()
+    
+    
+    def cancel_walk(self, wait=False):
+        """
+        :param wait: block until the walk has actually stopped
+        """
+        thread = self.walk_thread
+        if not thread:
+            return
+        thread.cancel()
+        if wait:
+            # it's going away, don't let its results anywhere near the scene
+            self.walk_thread = None
+            thread.wait()
+    
+    
+    def walk_status(self, counts, *args):
+        self.statusLbl.setText('{layers} layers, {prims} prims, {arcs} arcs'.format(**counts))
+    
+    
+    def walk_progress(self, counts, nodes, edges):
+        """
+        Add a batch of newly found nodes and connections to the scene while a walk is still going.
+        Only the arcs between the nodes go in now - the loose node connections need the whole graph,
+        so they get sorted out when the walk is done. The scene's index is off until then, see pause_scene_index.
+        """
+        if self.sender() is not self.walk_thread:
+            return
+        self.walk_status(counts)
+        if self.clusterCombo.currentText() != 'none':
+            # which cluster a node goes in can depend on nodes that haven't been found yet
+            return
+        
+        rect = self.nodz.scene().sceneRect()
         center = [rect.center().x(), rect.center().y()]
+        for path, info in nodes:
+            node_name = self.scene_name(path)
+            if node_name in self.scene_nodes:
+                continue
+            # stacked up in columns in the order they're found. the walk is depth first, so
+            # that's not far off. the proper layout happens when the walk is done
+            i = len(self.scene_nodes)
+            pos = QtCore.QPointF(center[0] - (i // 50) * 300, center[1] + (i % 50) * 60)
+            self.create_scene_node(node_name, info, pos)
+            self.scene_nodes[node_name] = info
+        
+        for start_path, end_path, port_type, edge_info in edges:
+            if port_type in LAYER_ARCS:
+                continue
+            key = (self.scene_name(end_path), self.scene_name(start_path), port_type)
+            if key[0] in self.scene_nodes and key[1] in self.scene_nodes and not key in self.scene_connections:
+                self.create_scene_connection(*key)
+                self.scene_connections[key] = None
+    
+    
+    def walk_done(self, walker, error):
+        thread = self.sender()
+        if thread is not self.walk_thread:
+            # cancelled and replaced by another walk
+            return
+        self.walk_thread = None
+        self.cancelBtn.setEnabled(False)
         
-        # pprint(x.nodes)
-        nds = []
-        for i, node in enumerate(x.nodes):
-            
-            info = x.nodes[node]
-            # print node
-            rnd = random.seed(i)
-            
-            pos = QtCore.QPointF((random.random() - 0.5) * 1000 + center[0],
-                                 (random.random() - 0.5) * 1000 + center[1])
-            node_label = os.path.basename(node)
-            
-            # node colouring / etc based on the node type
-            node_preset = 'node_default'
-            if info.get("type") == 'clip':
-                node_preset = 'node_clip'
-            elif info.get("type") == 'payload':
-                node_preset = 'node_payload'
-            elif info.get("type") == 'variant':
-                node_preset = 'node_variant'
-            elif info.get("type") == 'specialize':
-                node_preset = 'node_specialize'
-            elif info.get("type") == 'reference':
-                node_preset = 'node_reference'
-            if not node_label in nds:
-                nodeA = self.nodz.createNode(name=node_label, preset=node_preset, position=pos)
-                if self.usdfile == node:
-                    self.root_node = nodeA
-                
-                if nodeA:
-                    self.nodz.createAttribute(node=nodeA, name='out', index=0, preset='attr_preset_1',
-                                              plug=True, socket=False, dataType=int, socketMaxConnections=-1)
-                    
-                    nodeA.userData = info
-                    
-                    if info['online'] is False:
-                        self.nodz.createAttribute(node=nodeA, name='OFFLINE', index=0, preset='attr_preset_2',
-                                                  plug=False, socket=False)
-                
-                nds.append(node_label)
-        
-        # pprint(x.edges)
-        
-        # print 'wiring nodes'.center(40, '-')
-        # create all the node connections
-        for edge in x.edges:
-            start = os.path.basename(edge[0])
-            end = os.path.basename(edge[1])
-            port_type = edge[2]
-            start_node = self.nodz.scene().nodes[start]
-            end_node = self.nodz.scene().nodes[end]
-            self.nodz.createAttribute(node=start_node, name=port_type, index=-1, preset='attr_preset_1',
-                                      plug=False, socket=True, dataType=int, socketMaxConnections=-1)
+        if error is not None:
+            self.resume_scene_index()
+            self.statusLbl.setText(error)
+            return
+        self.walk_status(walker.counts)
+        
+        with self.bulk_scene_update():
+            # brings whatever got streamed in up to date with the finished graph
+            self.update_scene(walker.graph)
             
-            self.nodz.createConnection(end, 'out', start, port_type)
+            if not thread.reload:
+                # layout nodes!
+                self.layout_scene()
+        # the index gets rebuilt once, with everything in
+        self.resume_scene_index()
+        if not thread.reload:
+            self.nodz._focus()
         
-        # any nodes that don't have output connections
-        # ie, loose nodes
-        # use the layer traversal connections
-        for node_name in self.nodz.scene().nodes:
-            node = self.nodz.scene().nodes[node_name]
-            if not node.plugs['out'].connections:
-                if node == self.root_node:
-                    # skip the root node - it's never gonna have an out connection
-                    continue
-                
-                node_path = node.userData.get("path")
-                edge_info = [f for f in x.init_edges if f[1] == node_path]
-                if edge_info:
-                    start = os.path.basename(edge_info[0][1])
-                    end = os.path.basename(edge_info[0][0])
-                    end_node = self.nodz.scene().nodes[end]
-                    
-                    self.nodz.createAttribute(node=end_node, name='sublayer', index=-1, preset='attr_preset_1',
-                                              plug=False, socket=True, dataType=int, socketMaxConnections=-1)
-                    
-                    self.nodz.createConnection(start, 'out', end, 'sublayer')
+        # clip sequence nodes get marked up as the frame checks come in
+        walker.validateClips(callback=self.clipChecked.emit)
+        self.watch_paths()
         
-        # layout nodes!
-        self.nodz.arrangeGraph(self.root_node)
-        # self.nodz.autoLayoutGraph()
-        self.nodz._focus()
+        if self.changed_paths:
+            # more changes came in during the walk
+            self.watch_timer.start()
+    
+    
+    def watch_toggled(self, checked):
+        self.settings.setValue("watch", checked)
+        self.watch_paths()
+    
+    
+    def watch_paths(self):
+        """
+        Point the file watcher at every layer in the current graph.
+        Called after every walk - layers come and go, and a lot of editors save by writing a new file
+        and renaming it over the old one, which drops the watch.
+        """
+        watched = self.watcher.files()
+        if watched:
+            self.watcher.removePaths(watched)
+        if not self.watchChk.isChecked() or not self.walker:
+            return
+        
+        paths = [path for path, info in self.walker.graph.nodes()
+                 if info.get('online') and info.get('type') != 'clip']
+        if paths:
+            self.watcher.addPaths(paths)
+        logger.debug('watching {} files'.format(len(paths)))
+    
+    
+    def file_changed(self, path):
+        self.changed_paths.add(path)
+        # (re)start the countdown, so a burst of events turns into one re-walk
+        self.watch_timer.start()
+    
+    
+    def rewalk(self):
+        """
+        Re-walk the graph after its files have changed.
+        In layers mode only the changed layers are re-read, and their arcs are diffed against the graph.
+        In composed mode any change can recompose the whole stage, so it's the same as Reload - the stage
+        reloads just the changed layers, but all of them are walked again.
+        """
+        if not self.walker or not self.changed_paths:
+            return
+        if self.walk_thread:
+            # pick the changes up once the current walk is done
+            return
+        
+        logger.info('re-walking, changed: {}'.format(', '.join(sorted(self.changed_paths))))
+        changed = self.changed_paths
+        self.changed_paths = set()
+        if self.walker.mode == 'layers':
+            self.start_walk(self.walker, reload=True, paths=changed)
+        else:
+            self.start_walk(self.walker, reload=True)
+    
+    
+    def update_scene(self, graph):
+        """
+        Diff the scene's current state against a new graph and apply just the differences
+        
+        :param graph: DependencyGraph
+        """
+        old_nodes = self.scene_nodes
+        old_connections = self.scene_connections
+        nodes, connections = self.scene_state(graph)
+        scene_nodes = self.nodz.scene().nodes
+        
+        for key in old_connections:
+            if not key in connections:
+                self.delete_scene_connection(*key)
+        
+        removed = [node_name for node_name in old_nodes if not node_name in nodes]
+        for node_name in removed:
+            if node_name in scene_nodes:
+                self.nodz.deleteNode(scene_nodes[node_name])
+            self.search_index.remove(node_name)
+        
+        added = []
+        for node_name, info in nodes.items():
+            if not node_name in old_nodes:
+                added.append(node_name)
+            elif info != old_nodes[node_name]:
+                self.restyle_scene_node(scene_nodes[node_name], info)
+            else:
+                scene_nodes[node_name].userData = info
+        
+        # new nodes go next to whatever they're connected to
+        neighbours = {}
+        for plug_name, socket_name, port_type in connections:
+            neighbours.setdefault(plug_name, socket_name)
+            neighbours.setdefault(socket_name, plug_name)
+        rect = self.nodz.scene().sceneRect()
+        for i, node_name in enumerate(added):
+            neighbour = scene_nodes.get(neighbours.get(node_name))
+            if neighbour:
+                pos = neighbour.pos() + QtCore.QPointF(-300, 50 * (i % 5))
+            else:
+                pos = rect.center()
+            self.create_scene_node(node_name, nodes[node_name], pos)
+        
+        for key in connections:
+            if not key in old_connections:
+                self.create_scene_connection(*key)
+        
+        self.scene_nodes = nodes
+        self.scene_connections = connections
+        logger.info('reload: {} nodes added, {} removed, {} connections added, {} removed'.format(
+            len(added), len(removed), len([k for k in connections if not k in old_connections]),
+            len([k for k in old_connections if not k in connections])))
+    
+    
+    def update_clip_node(self, node_path, info):
+        node = self.nodz.scene().nodes.get(self.scene_name(node_path))
+        if not node or node.userData.get('path') != node_path:
+            # the graph has been reloaded since the check started
+            return
+        
+        node.setToolTip('{}\n{} frames'.format(node_path, info['frames']))
+        if info['online'] is False:
+            if not 'OFFLINE' in node.attrs:
+                self.nodz.createAttribute(node=node, name='OFFLINE', index=0, preset='attr_preset_2',
+                                          plug=False, socket=False)
+            self.nodz.createAttribute(node=node, name='{} of {} missing'.format(info['missing'], info['frames']),
+                                      index=1, preset='attr_preset_2', plug=False, socket=False)
+            node.setToolTip('{}\n{} frames\nmissing: {}'.format(node_path, info['frames'], info['missing_frames']))
+    
+    
+    def layout_scene(self):
+        """
+        Lay the scene's nodes out in layers, with the root on the right. See layout.layered_layout
+        """
+        # the layout works on the scene's own nodes and connections, so clusters get laid out too
+        scene_graph = DependencyGraph()
+        for node_name in self.scene_nodes:
+            scene_graph.add_node(node_name, {})
+        for plug_name, socket_name, port_type in self.scene_connections:
+            scene_graph.add_edge(socket_name, plug_name, port_type)
+        
+        scene_nodes = self.nodz.scene().nodes
+        heights = dict((node_name, node.boundingRect().height()) for node_name, node in scene_nodes.items())
+        positions = layout.layered_layout(scene_graph, root=self.scene_name(self.root_path()), heights=heights,
+                                          node_width=self.nodz.config['node_width'])
+        for node_name, (x, y) in positions.items():
+            node = scene_nodes.get(node_name)
+            if node:
+                node.setPos(x, y)
+        # connections don't follow setPos on their own
+        self.nodz.scene().updateScene()
     
     
     def layout_nodes(self):
         # layout nodes!
-        self.nodz.arrangeGraph(self.root_node)
+        with self.bulk_scene_update():
+            self.layout_scene()
         
         self.nodz._focus(all=True)
     
@@ -667,6 +968,12 @@ class NodeGraphWindow(QtWidgets.QDialog):
             self.find_win.close()
         
         self.settings.setValue("geometry", self.saveGeometry())
+        self.settings.setValue("walk_mode", self.modeCombo.currentText())
+        self.settings.setValue("cluster_mode", self.clusterCombo.currentText())
+        self.settings.setValue("max_depth", self.depthSpin.value())
+        self.watch_timer.stop()
+        self.cancel_walk(wait=True)
+        self.arc_cache.commit()
         super(NodeGraphWindow, self).closeEvent(*args)
 
 
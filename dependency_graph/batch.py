@@ -0,0 +1,112 @@
+import glob
+import logging
+import multiprocessing
+from collections import OrderedDict
+
+import cache
+from graph import DependencyGraph
+from walker import DependencyWalker
+
+
+logger = logging.getLogger('usd-dependency-graph')
+
+
+def expand_roots(patterns):
+    """
+    :param patterns: list of usd files and / or glob patterns
+    :return: list of root files, in the order given, without duplicates
+    """
+    roots = []
+    seen = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                logger.warning('nothing matches {}'.format(pattern))
+        else:
+            matches = [pattern]
+        for root in matches:
+            if not root in seen:
+                seen.add(root)
+                roots.append(root)
+    return roots
+
+
+def walk_root(job):
+    """
+    Walk one root file. Runs in a pool process, so it only hands back plain python.
+    
+    :param job: (root, mode, workers, cache path, max depth, payload depth, payload paths, prim paths, engine)
+    :return: (root, DependencyGraph.to_dict() or None, error message or None)
+    """
+    root, mode, workers, cache_path, max_depth, payload_depth, payload_paths, prim_paths, engine = job
+    arc_cache = None
+    try:
+        # inside the try - opening the shared cache can fail under contention too, eg database is locked
+        arc_cache = cache.ArcCache(cache_path)
+        x = DependencyWalker(root, mode=mode, workers=workers, cache=arc_cache, max_depth=max_depth,
+                             payload_depth=payload_depth, payload_paths=payload_paths, prim_paths=prim_paths,
+                             engine=engine)
+        x.start()
+        x.validateClips().join()
+        return root, x.graph.to_dict(), None
+    except Exception as e:
+        logger.exception('failed to walk {}'.format(root))
+        return root, None, str(e)
+    finally:
+        if arc_cache is not None:
+            arc_cache.close()
+
+
+def walk_many(roots, mode='composed', processes=None, workers=1, cache_path=None, max_depth=None,
+              payload_depth=0, payload_paths=None, prim_paths=None, engine='specs'):
+    """
+    Walk a lot of root files across a pool of processes.
+    The processes share one arc cache file, so once a set or character has been walked for
+    one shot, the rest of the shots only have to stat its layers.
+    
+    :param roots: list of root usd files
+    :param mode: walk mode
+    :param processes: pool size. defaults to the number of cpus
+    :param workers: threads per walk, for layers mode
+    :param cache_path: sqlite file shared by the processes. defaults to cache.default_cache_path()
+    :param max_depth: only open layers this many arcs down from each root. None walks everything
+    :param payload_depth: levels of nested payloads to load in composed mode. None loads everything
+    :param payload_paths: prim paths to load every payload under in composed mode
+    :param prim_paths: only walk the prims under these paths in composed mode
+    :param engine: how composed mode gets the arcs of each prim. one of walker.PRIM_ENGINES
+    :return: (OrderedDict of root: DependencyGraph,
+              union DependencyGraph - each node's info has a 'roots' count,
+              OrderedDict of root: error message for the roots that failed)
+    """
+    cache_path = cache_path or cache.default_cache_path()
+    # make sure the table exists before the workers all race to create it
+    cache.ArcCache(cache_path).close()
+    
+    jobs = [(root, mode, workers, cache_path, max_depth, payload_depth, payload_paths, prim_paths, engine)
+            for root in roots]
+    graphs = OrderedDict()
+    errors = OrderedDict()
+    union = DependencyGraph()
+    
+    pool = multiprocessing.Pool(processes)
+    try:
+        # imap keeps the results in the same order as the roots
+        for root, data, error in pool.imap(walk_root, jobs):
+            if error is not None:
+                errors[root] = error
+                continue
+            
+            graph = DependencyGraph.from_dict(data)
+            graphs[root] = graph
+            union.merge(graph)
+            for path, info in graph.nodes():
+                union_info = union.node(path)
+                union_info['roots'] = union_info.get('roots', 0) + 1
+    finally:
+        pool.close()
+        pool.join()
+    
+    logger.info('walked {} roots: {} nodes, {} edges in the union, {} failed'.format(
+        len(graphs), len(union), union.edge_count(), len(errors)))
+    return graphs, union, errors
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import os.path
+import sqlite3
+import threading
+
+
+def default_cache_path():
+    """
+    Where the arc cache lives, unless told otherwise.
+    Set USD_DEPENDENCY_GRAPH_CACHE to use a different file.
+    """
+    path = os.environ.get('USD_DEPENDENCY_GRAPH_CACHE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.cache', 'usd-dependency-graph', 'arcs.sqlite')
+
+
+def file_hash(path, block_size=1 << 20):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as fp:
+        for block in iter(lambda: fp.read(block_size), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+class ArcCache(object):
+    """
+    Persistent cache of the outgoing arcs of each layer, stored in a sqlite file.
+    
+    Entries are keyed on the resolved layer path and the walk mode, and are only valid while
+    the file's mtime and size (and optionally an md5 of its contents) still match.
+    Published assets don't change, so most of a warm walk never has to open a layer.
+    Lookups can come from the walker's worker threads, so everything goes through a lock.
+    Every put is committed straight away. Batch walks share the file between processes, and sqlite only
+    lets one of them write at a time - an open write transaction would lock the others out for a whole walk.
+    """
+    
+    def __init__(self, path=None, content_hash=False, timeout=30):
+        """
+        :param path: sqlite file. defaults to default_cache_path()
+        :param content_hash: also check an md5 of the file contents. safer, but reads every file
+        :param timeout: seconds to wait for another process to finish writing
+        """
+        self.path = path or default_cache_path()
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        # batch walks share the file between processes. wal lets them read while another one writes
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS arcs ('
+                           'path TEXT, mode TEXT, mtime REAL, size INTEGER, hash TEXT, arcs TEXT, '
+                           'PRIMARY KEY (path, mode))')
+        self._conn.commit()
+    
+    
+    def file_key(self, path):
+        """
+        :param path: resolved layer path
+        :return: (mtime, size, hash) of the file, or None if it can't be stat'd
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        digest = ''
+        if self.content_hash:
+            digest = file_hash(path)
+        return st.st_mtime, st.st_size, digest
+    
+    
+    def get(self, path, mode):
+        """
+        :param path: resolved layer path
+        :param mode: walk mode the arcs were found with
+        :return: list of arcs, or None if there's nothing cached or the file has changed
+        """
+        key = self.file_key(path)
+        with self._lock:
+            row = None
+            if key is not None:
+                row = self._conn.execute('SELECT mtime, size, hash, arcs FROM arcs WHERE path=? AND mode=?',
+                                         (path, mode)).fetchone()
+            if row is None or tuple(row[:3]) != key:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[3])
+    
+    
+    def put(self, path, mode, arcs):
+        """
+        :param path: resolved layer path
+        :param mode: walk mode the arcs were found with
+        :param arcs: list of arcs. must be json serialisable
+        """
+        key = self.file_key(path)
+        if key is None:
+            return
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO arcs VALUES (?, ?, ?, ?, ?, ?)',
+                               (path, mode, key[0], key[1], key[2], json.dumps(arcs)))
+            self._conn.commit()
+    
+    
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+    
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM arcs')
+            self._conn.commit()
+    
+    
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+Walk a usd file without any gui and write out its dependency graph.
+Imports no Qt, so it's fine for farm jobs. Run it as a script:
+    
+    python dependency_graph/cli.py shot.usd --format dot --output shot.dot
+
+Add --layout to get node positions from the same layered layout the gui uses.
+--compare-engines walks the file with both prim engines and reports their timings and any edges they
+disagree on, instead of writing a graph out.
+Give it more than one file, or a glob, and it walks them all across a pool of processes
+and writes out the union graph:
+    
+    python dependency_graph/cli.py "seq010/*/shot.usd" --output-dir graphs --output union.jsonl
+
+Exit status is 2 if --fail-on-missing is set and a dependency is offline, and 3 if any root of a batch
+couldn't be walked at all. A failed walk wins over offline dependencies.
+"""
+import argparse
+import glob
+import logging
+import os.path
+import sys
+
+import export
+from walker import DependencyWalker, WALK_MODES, PRIM_ENGINES
+
+
+logger = logging.getLogger('usd-dependency-graph')
+
+
+def payload_depth(value):
+    # 'all' loads every payload
+    if value == 'all':
+        return None
+    return int(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Write out the dependency graph of a usd file')
+    parser.add_argument('usdfile', nargs='+', help='root usd file(s). globs are expanded')
+    parser.add_argument('-f', '--format', choices=sorted(export.WRITERS), default='jsonl',
+                        help='output format (default: jsonl)')
+    parser.add_argument('-o', '--output', help='file to write to (default: stdout)')
+    parser.add_argument('-m', '--mode', choices=WALK_MODES, default='composed',
+                        help='composed: what the stage actually uses. layers: everything authored, '
+                             'no composition (default: composed)')
+    parser.add_argument('-e', '--engine', choices=PRIM_ENGINES, default='specs',
+                        help='composed mode. specs: read the arcs from every prim spec. pcp: read them from the '
+                             'composed prim indexes (default: specs)')
+    parser.add_argument('--compare-engines', action='store_true',
+                        help='walk the file with each engine, and report the timings and differences')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='threads used to open layers in layers mode (default: 4)')
+    parser.add_argument('-d', '--depth', type=int, default=None,
+                        help='only open layers this many arcs down from the root')
+    parser.add_argument('--payloads', type=payload_depth, default=0, metavar='DEPTH',
+                        help='composed mode. load payloads this many levels deep, or "all". unloaded payloads '
+                             'are still in the graph, just not what they bring in (default: 0)')
+    parser.add_argument('--load', action='append', default=[], metavar='PRIM_PATH',
+                        help='composed mode. load every payload under this prim. can be given more than once')
+    parser.add_argument('--prim', action='append', default=[], metavar='PRIM_PATH',
+                        help='composed mode. only walk the prims under this path, without composing the rest '
+                             'of the stage. can be given more than once')
+    # a flag and a separate path, rather than an optional value that would swallow the first root file
+    parser.add_argument('--cache', action='store_true', help='use the persistent arc cache')
+    parser.add_argument('--cache-path', metavar='PATH',
+                        help='sqlite file for the arc cache. implies --cache (default: $USD_DEPENDENCY_GRAPH_CACHE, or '
+                             '~/.cache/usd-dependency-graph/arcs.sqlite)')
+    parser.add_argument('--fail-on-missing', action='store_true',
+                        help='exit with status 2 if any dependency is offline. failed walks in a batch '
+                             'always exit with status 3')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='processes used to walk multiple root files (default: number of cpus)')
+    parser.add_argument('--output-dir', help='also write a graph for each root file into this directory')
+    parser.add_argument('--layout', action='store_true',
+                        help='lay the graph out and add x / y positions to the nodes')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only log warnings and errors')
+    return parser.parse_args(argv)
+
+
+def write_graph(graph, fmt, output=None):
+    """
+    :param graph: graph.DependencyGraph
+    :param fmt: one of export.WRITERS
+    :param output: file path. None writes to stdout
+    """
+    writer = export.WRITERS[fmt]
+    if output:
+        with open(output, 'w') as fp:
+            writer(graph, fp)
+    else:
+        writer(graph, sys.stdout)
+        sys.stdout.flush()
+
+
+def walk_single(args):
+    arc_cache = None
+    if args.cache or args.cache_path:
+        # sqlite is only worth importing when it's asked for
+        import cache
+        arc_cache = cache.ArcCache(args.cache_path)
+    
+    x = DependencyWalker(args.usdfile[0], mode=args.mode, workers=args.workers, cache=arc_cache,
+                         max_depth=args.depth, payload_depth=args.payloads, payload_paths=args.load,
+                         prim_paths=args.prim, engine=args.engine)
+    x.start()
+    # the clip frame checks have to be in before the graph goes out
+    x.validateClips().join()
+    
+    if arc_cache is not None:
+        arc_cache.close()
+    return x.graph
+
+
+def compare_engines(args):
+    """
+    Walk a file with each of the prim engines, and write out how long each phase took and the edges
+    that only one of them found. The arc cache isn't used, it would hide the difference.
+    
+    :return: exit status. 1 if the engines don't agree
+    """
+    walkers = []
+    for engine in PRIM_ENGINES:
+        x = DependencyWalker(args.usdfile[0], mode='composed', max_depth=args.depth, payload_depth=args.payloads,
+                             payload_paths=args.load, prim_paths=args.prim, engine=engine)
+        x.start()
+        walkers.append(x)
+    
+    phases = ['open', 'layers', 'prims']
+    sys.stdout.write('{:<8}'.format('engine') + ''.join('{:>10}'.format(phase) for phase in phases + ['total']) +
+                     '{:>10}{:>10}\n'.format('nodes', 'edges'))
+    for x in walkers:
+        sys.stdout.write('{:<8}'.format(x.engine) +
+                         ''.join('{:>10.3f}'.format(x.timings.get(phase, 0.0)) for phase in phases) +
+                         '{:>10.3f}{:>10}{:>10}\n'.format(sum(x.timings.values()), len(x.graph), x.graph.edge_count()))
+    
+    edges = [set(x.graph.edges()) for x in walkers]
+    differ = False
+    for i, x in enumerate(walkers):
+        others = set().union(*[edges[j] for j in range(len(walkers)) if j != i])
+        only = sorted(edges[i] - others)
+        sys.stdout.write('only in {}: {} edges\n'.format(x.engine, len(only)))
+        for src, dst, arc_type in only:
+            differ = True
+            sys.stdout.write('    {} -> {} ({})\n'.format(src, dst, arc_type))
+    sys.stdout.flush()
+    return 1 if differ else 0
+
+
+def walk_batch(args):
+    """
+    :return: (union DependencyGraph, OrderedDict of root: error message for the roots that failed)
+    """
+    import batch
+    
+    roots = batch.expand_roots(args.usdfile)
+    # the shared arc cache is the whole point of a batch, so it's always on
+    graphs, union, errors = batch.walk_many(roots, mode=args.mode, processes=args.processes,
+                                            workers=args.workers, cache_path=args.cache_path,
+                                            max_depth=args.depth, payload_depth=args.payloads,
+                                            payload_paths=args.load, prim_paths=args.prim, engine=args.engine)
+    
+    if args.output_dir:
+        if not os.path.isdir(args.output_dir):
+            os.makedirs(args.output_dir)
+        used = set()
+        for root, graph in graphs.items():
+            name = os.path.splitext(os.path.basename(root))[0]
+            # plenty of shots have the same file name
+            unique = name
+            count = 1
+            while unique in used:
+                count += 1
+                unique = '{}_{}'.format(name, count)
+            used.add(unique)
+            write_graph(graph, args.format, os.path.join(args.output_dir, '{}.{}'.format(unique, args.format)))
+    
+    for root, error in errors.items():
+        logger.error('{}: {}'.format(root, error))
+    return union, errors
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quiet:
+        logger.setLevel(logging.WARNING)
+    
+    if args.compare_engines:
+        return compare_engines(args)
+    
+    errors = {}
+    if len(args.usdfile) > 1 or glob.has_magic(args.usdfile[0]):
+        graph, errors = walk_batch(args)
+    else:
+        graph = walk_single(args)
+    
+    if args.layout:
+        import layout
+        root = args.usdfile[0] if len(args.usdfile) == 1 else None
+        for path, (x, y) in layout.layered_layout(graph, root=root).items():
+            info = graph.node(path)
+            info['x'] = x
+            info['y'] = y
+    
+    write_graph(graph, args.format, args.output)
+    
+    offline = [path for path, info in graph.nodes() if info.get('online') is False]
+    for path in offline:
+        logger.warning('offline: {}'.format(path))
+    if errors:
+        # a root that wasn't walked says nothing about its dependencies. that can't pass a pre-flight
+        logger.error('{} roots failed to walk'.format(len(errors)))
+        return 3
+    if offline and args.fail_on_missing:
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Group the nodes of a dependency graph into clusters.
+
+A set dressing shot can pull in thousands of files from a handful of asset directories.
+Nobody wants to look at (or wait for) a node for each one, so they get collapsed into a
+cluster node per directory, asset or arc type. Clusters can be expanded one at a time.
+Works on the DependencyGraph the walker builds, nothing here needs Qt.
+"""
+import os.path
+from collections import OrderedDict
+
+from graph import DependencyGraph
+
+
+# none: no clustering
+# directory: files in the same directory
+# asset: everything under the same reference or payload. ie, everything one asset brings in
+# arc: by the kind of arc that brings the file in
+CLUSTER_MODES = ['none', 'directory', 'asset', 'arc']
+
+CLUSTER_PREFIX = 'cluster:'
+
+
+def cluster_path(mode, key):
+    """
+    :return: node path of the cluster with this key
+    """
+    return '{}{}:{}'.format(CLUSTER_PREFIX, mode, key)
+
+
+def is_cluster(path):
+    return path.startswith(CLUSTER_PREFIX)
+
+
+def cluster_label(path):
+    """
+    :param path: cluster node path
+    :return: short name for the cluster. 'trees/' for a directory, 'payloads' for an arc type
+    """
+    mode, key = path[len(CLUSTER_PREFIX):].split(':', 1)
+    if mode == 'arc':
+        return '{}s'.format(key)
+    return '{}/'.format(os.path.basename(key.rstrip('/\\')) or key)
+
+
+def asset_roots(graph, root):
+    """
+    Work out which asset every node belongs to. An asset is a reference or payload target,
+    plus everything it brings in through its own layers.
+    
+    :param graph: DependencyGraph
+    :param root: path of the root node
+    :return: dict of node path: directory of the asset it's part of. nodes that aren't part of an
+             asset (the root and its own layer stack) aren't in there
+    """
+    # None for nodes known not to be in an asset, so nothing gets followed up twice
+    known = {root: None}
+    for path, info in graph.nodes():
+        # follow the first incoming edge up until we hit an asset, the root or something we know about
+        chain = []
+        current = path
+        asset = None
+        while current is not None:
+            if current in known:
+                asset = known[current]
+                break
+            chain.append(current)
+            # mark it straight away, so a cycle ends the loop
+            known[current] = None
+            current_info = graph.node(current)
+            if current_info and current_info.get('type') in ('reference', 'payload'):
+                asset = os.path.dirname(current)
+                break
+            in_edges = graph.in_edges(current)
+            current = in_edges[0][0] if in_edges else None
+        
+        for member in chain:
+            known[member] = asset
+    
+    return dict((path, asset) for path, asset in known.items() if asset is not None)
+
+
+def cluster_keys(graph, mode, root):
+    """
+    :param graph: DependencyGraph
+    :param mode: one of CLUSTER_MODES
+    :param root: path of the root node. never clustered
+    :return: dict of node path: cluster key, for every node that could go into a cluster
+    """
+    if mode == 'none':
+        return {}
+    
+    if mode == 'asset':
+        return asset_roots(graph, root)
+    
+    keys = {}
+    for path, info in graph.nodes():
+        if path == root:
+            continue
+        if mode == 'directory':
+            keys[path] = os.path.dirname(path)
+        elif mode == 'arc':
+            keys[path] = info.get('type', 'layer')
+        else:
+            raise ValueError("Unknown cluster mode: %s" % mode)
+    return keys
+
+
+def cluster_graph(graph, mode, root, expanded=(), min_size=2):
+    """
+    Collapse a graph's nodes into clusters.
+    
+    Cluster nodes have the info {'type': 'cluster', 'path': cluster path, 'key': cluster key,
+    'members': [node paths], 'count': number of members, 'online': False if any member is offline}.
+    Edges to and from members are moved onto the cluster, and have a 'count' of how many edges
+    they stand for. Edges inside a cluster are dropped.
+    
+    :param graph: DependencyGraph
+    :param mode: one of CLUSTER_MODES
+    :param root: path of the root node. never clustered
+    :param expanded: cluster paths to leave expanded. their members are kept as they are
+    :param min_size: fewer members than this and the nodes are left alone
+    :return: DependencyGraph. the graph itself if there's nothing to cluster
+    """
+    keys = cluster_keys(graph, mode, root)
+    if not keys:
+        return graph
+    
+    members = OrderedDict()
+    for path, info in graph.nodes():
+        key = keys.get(path)
+        if key is not None:
+            members.setdefault(key, []).append(path)
+    
+    # node path: cluster path, for the nodes that are collapsed
+    collapsed = {}
+    for key, paths in members.items():
+        path = cluster_path(mode, key)
+        if len(paths) < min_size or path in expanded:
+            continue
+        for member in paths:
+            collapsed[member] = path
+    
+    if not collapsed:
+        return graph
+    
+    clustered = DependencyGraph()
+    for path, info in graph.nodes():
+        cluster = collapsed.get(path)
+        if cluster is None:
+            clustered.add_node(path, info)
+            continue
+        
+        cluster_info = clustered.node(cluster)
+        if cluster_info is None:
+            cluster_info = {'type': 'cluster', 'path': cluster, 'key': keys[path], 'members': [],
+                            'count': 0, 'online': True, 'mute': False}
+            clustered.add_node(cluster, cluster_info)
+        cluster_info['members'].append(path)
+        cluster_info['count'] += 1
+        if info.get('online') is False:
+            cluster_info['online'] = False
+    
+    for src, dst, arc_type in graph.edges():
+        new_src = collapsed.get(src, src)
+        new_dst = collapsed.get(dst, dst)
+        if new_src == new_dst and new_src != src:
+            # inside a cluster
+            continue
+        if new_src == src and new_dst == dst:
+            clustered.add_edge(src, dst, arc_type, **graph.edge(src, dst, arc_type))
+            continue
+        edge_info = clustered.edge(new_src, new_dst, arc_type)
+        count = edge_info['count'] + 1 if edge_info else 1
+        clustered.add_edge(new_src, new_dst, arc_type, count=count)
+    
+    return clustered
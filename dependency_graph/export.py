@@ -0,0 +1,110 @@
+import json
+import os.path
+from xml.sax.saxutils import escape, quoteattr
+
+
+# node info worth putting in the exported graph. everything else is walker bookkeeping
+NODE_KEYS = ['path', 'type', 'online', 'mute', 'frames', 'missing', 'missing_frames', 'roots', 'expanded', 'x', 'y']
+
+
+def node_record(graph, path, info):
+    record = {'id': graph.intern(path), 'label': os.path.basename(path)}
+    for key in NODE_KEYS:
+        if key in info:
+            record[key] = info[key]
+    record['path'] = path
+    return record
+
+
+def write_jsonl(graph, fp):
+    """
+    One json object per line. All the nodes first, then all the edges.
+    {"kind": "node", "id": 0, "path": "/a/shot.usd", "label": "shot.usd", "type": "layer", "online": true}
+    {"kind": "edge", "source": "/a/shot.usd", "target": "/a/set.usd", "arc": "reference"}
+    
+    :param graph: graph.DependencyGraph
+    :param fp: file object to write to
+    """
+    for path, info in graph.nodes():
+        record = node_record(graph, path, info)
+        record['kind'] = 'node'
+        fp.write(json.dumps(record, sort_keys=True) + '\n')
+    
+    for src, dst, arc_type in graph.edges():
+        record = dict(graph.edge(src, dst, arc_type))
+        record['kind'] = 'edge'
+        record['source'] = src
+        record['target'] = dst
+        record['arc'] = arc_type
+        fp.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def dot_quote(text):
+    return '"%s"' % str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_dot(graph, fp):
+    """
+    Graphviz dot. Nodes are keyed by path and labelled with the file name. Offline nodes are red.
+    
+    :param graph: graph.DependencyGraph
+    :param fp: file object to write to
+    """
+    fp.write('digraph dependencies {\n')
+    fp.write('    node [shape=box];\n')
+    for path, info in graph.nodes():
+        attrs = ['label=%s' % dot_quote(os.path.basename(path)),
+                 'type=%s' % dot_quote(info.get('type', ''))]
+        if info.get('online') is False:
+            attrs.append('color=red')
+        if 'x' in info:
+            # neato -n keeps these. graphviz y goes up
+            attrs.append('pos="%s,%s!"' % (info['x'], -info['y']))
+        fp.write('    %s [%s];\n' % (dot_quote(path), ', '.join(attrs)))
+    
+    for src, dst, arc_type in graph.edges():
+        fp.write('    %s -> %s [label=%s];\n' % (dot_quote(src), dot_quote(dst), dot_quote(arc_type)))
+    fp.write('}\n')
+
+
+def write_graphml(graph, fp):
+    """
+    GraphML, for yEd, Gephi and friends
+    
+    :param graph: graph.DependencyGraph
+    :param fp: file object to write to
+    """
+    fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    fp.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    fp.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+    fp.write('  <key id="type" for="node" attr.name="type" attr.type="string"/>\n')
+    fp.write('  <key id="online" for="node" attr.name="online" attr.type="string"/>\n')
+    fp.write('  <key id="x" for="node" attr.name="x" attr.type="double"/>\n')
+    fp.write('  <key id="y" for="node" attr.name="y" attr.type="double"/>\n')
+    fp.write('  <key id="arc" for="edge" attr.name="arc" attr.type="string"/>\n')
+    fp.write('  <graph id="dependencies" edgedefault="directed">\n')
+    
+    for path, info in graph.nodes():
+        fp.write('    <node id=%s>\n' % quoteattr(path))
+        fp.write('      <data key="label">%s</data>\n' % escape(os.path.basename(path)))
+        fp.write('      <data key="type">%s</data>\n' % escape(str(info.get('type', ''))))
+        fp.write('      <data key="online">%s</data>\n' % escape(str(info.get('online')).lower()))
+        for key in ['x', 'y']:
+            if key in info:
+                fp.write('      <data key="%s">%s</data>\n' % (key, info[key]))
+        fp.write('    </node>\n')
+    
+    for src, dst, arc_type in graph.edges():
+        fp.write('    <edge source=%s target=%s>\n' % (quoteattr(src), quoteattr(dst)))
+        fp.write('      <data key="arc">%s</data>\n' % escape(arc_type))
+        fp.write('    </edge>\n')
+    
+    fp.write('  </graph>\n')
+    fp.write('</graphml>\n')
+
+
+WRITERS = {
+    'jsonl': write_jsonl,
+    'dot': write_dot,
+    'graphml': write_graphml,
+}
@@ -0,0 +1,260 @@
+from collections import OrderedDict
+
+
+# arcs found by walking the layers themselves, as opposed to walking the composed prims
+LAYER_ARCS = frozenset(['layer', 'sublayer'])
+
+
+class DependencyGraph(object):
+    """
+    Directed graph of layer / asset dependencies
+    
+    Node paths are interned to integer ids. Edges are keyed by (src id, dst id, arc type),
+    and each node keeps a set of its incoming and outgoing edge keys, so adding an edge or
+    checking whether it's already there is O(1) no matter how big the graph gets.
+    Iteration order is insertion order.
+    """
+    
+    def __init__(self):
+        self._ids = {}
+        self._paths = []
+        self._info = []
+        self._out = []
+        self._in = []
+        self._edges = OrderedDict()
+        # edge keys in the order they were added. lets a graph be handed out in batches as it grows
+        self._edge_order = []
+    
+    
+    def __len__(self):
+        return len(self._ids) - self._info.count(None)
+    
+    
+    def __contains__(self, path):
+        return self.has_node(path)
+    
+    
+    def intern(self, path):
+        """
+        Get the id for a path, allocating a new one if it hasn't been seen before
+        
+        :param path: node path
+        :return: int node id
+        """
+        node_id = self._ids.get(path)
+        if node_id is None:
+            node_id = len(self._paths)
+            self._ids[path] = node_id
+            self._paths.append(path)
+            self._info.append(None)
+            self._out.append(set())
+            self._in.append(set())
+        return node_id
+    
+    
+    def path(self, node_id):
+        return self._paths[node_id]
+    
+    
+    def has_node(self, path):
+        node_id = self._ids.get(path)
+        return node_id is not None and self._info[node_id] is not None
+    
+    
+    def node(self, path):
+        """
+        :param path: node path
+        :return: info dict of the node, or None
+        """
+        node_id = self._ids.get(path)
+        if node_id is None:
+            return None
+        return self._info[node_id]
+    
+    
+    def add_node(self, path, info):
+        """
+        Add a node, replacing the info of any existing node with the same path
+        
+        :param path: node path
+        :param info: dict of node info
+        :return: int node id
+        """
+        node_id = self.intern(path)
+        self._info[node_id] = info
+        return node_id
+    
+    
+    def nodes(self):
+        """
+        :return: generator of (path, info) for every node
+        """
+        for node_id, info in enumerate(self._info):
+            if info is not None:
+                yield self._paths[node_id], info
+    
+    
+    def add_edge(self, src, dst, arc_type, **info):
+        """
+        Add an edge. Duplicates are ignored, although their info is merged into the existing edge.
+        
+        :param src: path of the node that holds the arc
+        :param dst: path the arc points at
+        :param arc_type: 'layer', 'sublayer', 'payload', 'reference', 'clip'...
+        :return: True if this is a new edge
+        """
+        key = (self.intern(src), self.intern(dst), arc_type)
+        existing = self._edges.get(key)
+        if existing is not None:
+            existing.update(info)
+            return False
+        
+        self._edges[key] = info
+        self._edge_order.append(key)
+        self._out[key[0]].add(key)
+        self._in[key[1]].add(key)
+        return True
+    
+    
+    def remove_edge(self, src, dst, arc_type):
+        """
+        :return: True if there was an edge to remove
+        """
+        if not self.has_edge(src, dst, arc_type):
+            return False
+        key = (self._ids[src], self._ids[dst], arc_type)
+        del self._edges[key]
+        self._out[key[0]].discard(key)
+        self._in[key[1]].discard(key)
+        # the key stays in _edge_order. added_since skips it
+        return True
+    
+    
+    def remove_node(self, path):
+        """
+        Remove a node and every edge in or out of it. Its id stays interned
+        
+        :return: True if there was a node to remove
+        """
+        if not self.has_node(path):
+            return False
+        node_id = self._ids[path]
+        for key in list(self._out[node_id]) + list(self._in[node_id]):
+            self._edges.pop(key, None)
+            self._out[key[0]].discard(key)
+            self._in[key[1]].discard(key)
+        self._info[node_id] = None
+        return True
+    
+    
+    def has_edge(self, src, dst, arc_type):
+        src_id = self._ids.get(src)
+        dst_id = self._ids.get(dst)
+        if src_id is None or dst_id is None:
+            return False
+        return (src_id, dst_id, arc_type) in self._edges
+    
+    
+    def edge(self, src, dst, arc_type):
+        """
+        :return: info dict of the edge, or None
+        """
+        if not self.has_edge(src, dst, arc_type):
+            return None
+        return self._edges[(self._ids[src], self._ids[dst], arc_type)]
+    
+    
+    def edge_count(self):
+        return len(self._edges)
+    
+    
+    def edges(self):
+        """
+        :return: generator of (src path, dst path, arc type) for every edge
+        """
+        paths = self._paths
+        for src_id, dst_id, arc_type in self._edges:
+            yield paths[src_id], paths[dst_id], arc_type
+    
+    
+    def added_since(self, mark=None):
+        """
+        Nodes and edges added since an earlier call. Used to pass a graph on in batches while it's
+        still being built - it only reads the ends of lists, so it's fine to call from another thread.
+        
+        :param mark: mark returned by the last call. None for everything
+        :return: (list of (path, info), list of (src path, dst path, arc type, info), new mark)
+        """
+        node_start, edge_start = mark or (0, 0)
+        node_end = len(self._info)
+        edge_end = len(self._edge_order)
+        
+        # paths only interned by an edge so far are skipped. if they become nodes later they
+        # won't be in a batch - the full graph is still there once it's finished
+        nodes = [(self._paths[node_id], self._info[node_id]) for node_id in range(node_start, node_end)
+                 if self._info[node_id] is not None]
+        
+        paths = self._paths
+        edges = [(paths[key[0]], paths[key[1]], key[2], self._edges[key])
+                 for key in self._edge_order[edge_start:edge_end] if key in self._edges]
+        return nodes, edges, (node_end, edge_end)
+    
+    
+    def out_edges(self, path):
+        """
+        :return: list of (src path, dst path, arc type) for edges leaving path
+        """
+        return self._adjacent(self._out, path)
+    
+    
+    def in_edges(self, path):
+        """
+        :return: list of (src path, dst path, arc type) for edges arriving at path
+        """
+        return self._adjacent(self._in, path)
+    
+    
+    def _adjacent(self, adjacency, path):
+        node_id = self._ids.get(path)
+        if node_id is None:
+            return []
+        paths = self._paths
+        # node ids are handed out in insertion order, so sorting keeps things deterministic
+        return [(paths[src_id], paths[dst_id], arc_type) for src_id, dst_id, arc_type in sorted(adjacency[node_id])]
+    
+    
+    def to_dict(self):
+        """
+        Plain python version of the graph. Picklable and json serialisable, as long as the info is.
+        
+        :return: {'nodes': [[path, info], ...], 'edges': [[src, dst, arc type, info], ...]}
+        """
+        return {'nodes': [[path, info] for path, info in self.nodes()],
+                'edges': [[src, dst, arc_type, self.edge(src, dst, arc_type)] for src, dst, arc_type in self.edges()]}
+    
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: output of to_dict
+        :return: DependencyGraph
+        """
+        graph = cls()
+        for path, info in data['nodes']:
+            graph.add_node(path, info)
+        for src, dst, arc_type, info in data['edges']:
+            graph.add_edge(src, dst, arc_type, **info)
+        return graph
+    
+    
+    def merge(self, other):
+        """
+        Add another graph's nodes and edges to this one. Nodes that are already here keep their info.
+        
+        :param other: DependencyGraph
+        """
+        for path, info in other.nodes():
+            if not self.has_node(path):
+                self.add_node(path, dict(info))
+        for src, dst, arc_type in other.edges():
+            self.add_edge(src, dst, arc_type, **other.edge(src, dst, arc_type))
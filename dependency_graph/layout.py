@@ -0,0 +1,274 @@
+"""
+Layered (Sugiyama style) layout of a dependency graph.
+
+1. cycles are broken by ignoring the edges that point back up a depth first walk
+2. longest path layering - every file sits at least one layer further out than anything that uses it
+3. edges that span more than one layer get a chain of dummy nodes, one per layer
+4. crossings are cut down with a few barycenter sweeps up and down the layers
+5. x comes from the layer, y from the order in the layer, nudged towards the neighbours
+   in the layer before and packed so nothing overlaps
+
+Nodz plugs are on the right of a node and sockets on the left, so the root goes on the right
+and its dependencies spread out to the left.
+Uses numpy when it's there, and plain python lists when it isn't. No Qt.
+"""
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def break_cycles(count, adjacency, roots):
+    """
+    :param count: number of nodes
+    :param adjacency: list of lists of child node indices
+    :param roots: node indices to start walking from first
+    :return: set of (parent, child) edges that point back up the walk
+    """
+    back_edges = set()
+    # 0 unvisited, 1 on the current branch, 2 done
+    state = [0] * count
+    starts = list(roots) + list(range(count))
+    for start in starts:
+        if state[start]:
+            continue
+        state[start] = 1
+        stack = [(start, iter(adjacency[start]))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node] = 2
+                stack.pop()
+            elif state[child] == 1:
+                back_edges.add((node, child))
+            elif state[child] == 0:
+                state[child] = 1
+                stack.append((child, iter(adjacency[child])))
+    return back_edges
+
+
+def longest_path_layers(count, edges):
+    """
+    :param count: number of nodes
+    :param edges: list of (parent, child) node indices. has to be acyclic
+    :return: list of the layer of each node. nodes nothing depends on are in layer 0
+    """
+    children = [[] for i in range(count)]
+    in_degree = [0] * count
+    for parent, child in edges:
+        children[parent].append(child)
+        in_degree[child] += 1
+    
+    layers = [0] * count
+    ready = [node for node in range(count) if not in_degree[node]]
+    while ready:
+        node = ready.pop()
+        layer = layers[node] + 1
+        for child in children[node]:
+            if layers[child] < layer:
+                layers[child] = layer
+            in_degree[child] -= 1
+            if not in_degree[child]:
+                ready.append(child)
+    return layers
+
+
+def barycenters(size, local_nodes, neighbour_positions, current):
+    """
+    Average position of each node's neighbours in the layer next door
+    
+    :param size: number of nodes in the layer
+    :param local_nodes: index in the layer of the node at one end of each edge
+    :param neighbour_positions: position in the other layer of the node at the other end of each edge
+    :param current: current position of each node in the layer. used for nodes with no neighbours
+    :return: list of barycenters. an array if numpy's about
+    """
+    if numpy is not None:
+        local_nodes = numpy.asarray(local_nodes, dtype=numpy.int64)
+        totals = numpy.bincount(local_nodes, weights=numpy.asarray(neighbour_positions, dtype=float),
+                                minlength=size)
+        counts = numpy.bincount(local_nodes, minlength=size)
+        current = numpy.asarray(current, dtype=float)
+        # nodes with no neighbours over there stay put
+        return numpy.where(counts > 0, totals / numpy.maximum(counts, 1), current)
+    
+    totals = [0.0] * size
+    counts = [0] * size
+    for node, position in zip(local_nodes, neighbour_positions):
+        totals[node] += position
+        counts[node] += 1
+    return [totals[i] / counts[i] if counts[i] else current[i] for i in range(size)]
+
+
+def pack(desired, heights, gap):
+    """
+    Place the nodes of a layer as close to where they want to be as possible, in order, without overlapping
+    
+    :param desired: wanted y of each node, in layer order
+    :param heights: height of each node, in layer order
+    :param gap: space between nodes
+    :return: list of y. an array if numpy's about
+    """
+    if numpy is not None:
+        heights = numpy.asarray(heights, dtype=float)
+        # where each node would sit if they were all stacked up tight from 0
+        offsets = numpy.concatenate([[0.0], numpy.cumsum(heights + gap)[:-1]])
+        # pushing everything down to clear the node above is a running max relative to the tight stack
+        return numpy.maximum.accumulate(numpy.asarray(desired, dtype=float) - offsets) + offsets
+    
+    ys = []
+    bottom = None
+    for y, height in zip(desired, heights):
+        if bottom is not None and y < bottom:
+            y = bottom
+        ys.append(y)
+        bottom = y + height + gap
+    return ys
+
+
+def layered_layout(graph, root=None, heights=None, node_width=200, node_height=25, x_gap=100, y_gap=20,
+                   sweeps=4):
+    """
+    Lay a graph out in layers
+    
+    :param graph: graph.DependencyGraph
+    :param root: path of the root node. goes in the first layer
+    :param heights: optional dict of node path: height. defaults to node_height
+    :param node_width: width of a node
+    :param node_height: height of a node not in heights
+    :param x_gap: space between layers
+    :param y_gap: space between nodes in a layer
+    :param sweeps: number of up and down crossing reduction sweeps
+    :return: OrderedDict of node path: (x, y) of the node's top left corner
+    """
+    paths = [path for path, info in graph.nodes()]
+    count = len(paths)
+    if not count:
+        return OrderedDict()
+    index = dict((path, i) for i, path in enumerate(paths))
+    
+    # arc types don't matter here, just who depends on who
+    pairs = OrderedDict()
+    for src, dst, arc_type in graph.edges():
+        if src != dst and src in index and dst in index:
+            pairs[(index[src], index[dst])] = None
+    adjacency = [[] for i in range(count)]
+    for parent, child in pairs:
+        adjacency[parent].append(child)
+    
+    roots = [index[root]] if root in index else []
+    back_edges = break_cycles(count, adjacency, roots)
+    edges = [edge for edge in pairs if not edge in back_edges]
+    layer_of = longest_path_layers(count, edges)
+    
+    # long edges get a dummy node in each layer they pass through
+    # so the crossing reduction sees them, and only edges between neighbouring layers are left
+    short_edges = []
+    for parent, child in edges:
+        previous = parent
+        for layer in range(layer_of[parent] + 1, layer_of[child]):
+            dummy = len(layer_of)
+            layer_of.append(layer)
+            short_edges.append((previous, dummy))
+            previous = dummy
+        short_edges.append((previous, child))
+    total = len(layer_of)
+    
+    # starting order is depth first from the root, which already keeps subtrees together
+    layer_count = max(layer_of) + 1
+    layers = [[] for i in range(layer_count)]
+    down = [[] for i in range(total)]
+    for parent, child in short_edges:
+        down[parent].append(child)
+    placed = [False] * total
+    for start in roots + list(range(total)):
+        if placed[start]:
+            continue
+        placed[start] = True
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            layers[layer_of[node]].append(node)
+            for child in reversed(down[node]):
+                if not placed[child]:
+                    placed[child] = True
+                    stack.append(child)
+    
+    # the edges between each layer and the one before it, and the one after it
+    # as (nodes in this layer, the node at the other end) so a sweep doesn't go near the edge lists
+    edges_before = [([], []) for i in range(layer_count)]
+    edges_after = [([], []) for i in range(layer_count)]
+    for parent, child in short_edges:
+        edges_before[layer_of[child]][0].append(child)
+        edges_before[layer_of[child]][1].append(parent)
+        edges_after[layer_of[parent]][0].append(parent)
+        edges_after[layer_of[parent]][1].append(child)
+    
+    heights = heights or {}
+    # dummies don't take up any room, apart from the gap
+    size = [heights.get(paths[node], node_height) if node < count else 0 for node in range(total)]
+    position = [0] * total
+    for layer in layers:
+        for i, node in enumerate(layer):
+            position[node] = i
+    
+    if numpy is not None:
+        layers = [numpy.array(layer, dtype=numpy.int64) for layer in layers]
+        edges_before = [(numpy.array(nodes, dtype=numpy.int64), numpy.array(others, dtype=numpy.int64))
+                        for nodes, others in edges_before]
+        edges_after = [(numpy.array(nodes, dtype=numpy.int64), numpy.array(others, dtype=numpy.int64))
+                       for nodes, others in edges_after]
+        position = numpy.array(position, dtype=numpy.int64)
+        size = numpy.array(size, dtype=float)
+    
+    def sweep(layer_indices, layer_edges):
+        for l in layer_indices:
+            layer = layers[l]
+            nodes, others = layer_edges[l]
+            if numpy is not None:
+                centers = barycenters(len(layer), position[nodes], position[others], position[layer])
+                # mergesort is stable, ties keep their order
+                layer = layer[numpy.argsort(centers, kind='mergesort')]
+                position[layer] = numpy.arange(len(layer))
+                layers[l] = layer
+            else:
+                centers = barycenters(len(layer), [position[node] for node in nodes],
+                                      [position[node] for node in others], [position[node] for node in layer])
+                layer[:] = [layer[i] for i in sorted(range(len(layer)), key=centers.__getitem__)]
+                for i, node in enumerate(layer):
+                    position[node] = i
+    
+    for i in range(sweeps):
+        sweep(range(1, layer_count), edges_before)
+        sweep(range(layer_count - 2, -1, -1), edges_after)
+    
+    # coordinates. each node wants to be level with the middle of its parents
+    # nodes without any start off stacked up in order
+    if numpy is not None:
+        ys = numpy.zeros(total)
+        for l, layer in enumerate(layers):
+            nodes, others = edges_before[l]
+            middles = barycenters(len(layer), position[nodes], ys[others] + size[others] / 2.0,
+                                  position[layer] * float(node_height + y_gap) + size[layer] / 2.0)
+            ys[layer] = pack(middles - size[layer] / 2.0, size[layer], y_gap)
+        ys = ys.tolist()
+    else:
+        ys = [0.0] * total
+        for l, layer in enumerate(layers):
+            nodes, others = edges_before[l]
+            middles = barycenters(len(layer), [position[node] for node in nodes],
+                                  [ys[node] + size[node] / 2.0 for node in others],
+                                  [position[node] * float(node_height + y_gap) + size[node] / 2.0 for node in layer])
+            desired = [middle - size[node] / 2.0 for middle, node in zip(middles, layer)]
+            for node, y in zip(layer, pack(desired, [size[node] for node in layer], y_gap)):
+                ys[node] = y
+    
+    positions = OrderedDict()
+    for node, path in enumerate(paths):
+        # layer 0 on the right
+        x = -layer_of[node] * (node_width + x_gap)
+        positions[path] = (float(x), ys[node])
+    return positions
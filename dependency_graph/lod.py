@@ -0,0 +1,134 @@
+"""
+Level of detail drawing for the Nodz items.
+
+Nodz draws every node in full at every zoom level - title, attribute rows, plugs and sockets.
+Zoomed out over a few thousand nodes that's a lot of text nobody can read.
+install() wraps the paint methods of the Nodz item classes so that, based on how wide a node
+ends up on screen:
+
+- wider than attributes_display_limit pixels: drawn by Nodz as normal
+- narrower than that: a plain box with just the title. no attribute rows, plugs or sockets.
+  offline nodes get the offline colour as their border, so they still stand out
+- narrower than node_title_display_limit pixels: just the box
+
+Both limits come from the Nodz config. Connections lose their antialiasing when zoomed out.
+Nodes are named (and keyed) by their full path. If a node has a label, that's drawn instead.
+Items outside the view are already skipped by the scene's bsp index, so once the per item
+cost is small, drawing stays flat however big the graph is.
+"""
+from Qt import QtCore, QtGui, QtWidgets
+
+
+LIMITS = {
+    'title': 60,
+    'attributes': 115,
+}
+
+OFFLINE_COLOR = QtGui.QColor(250, 120, 120, 255)
+
+
+def screen_width(item, painter, option):
+    """
+    :return: how many pixels wide the item is in the view that's drawing it
+    """
+    scale = option.levelOfDetailFromTransform(painter.worldTransform())
+    return scale * item.boundingRect().width()
+
+
+def node_label(node):
+    return getattr(node, 'label', None) or node.name
+
+
+def original_paint(cls):
+    # reloading the app would otherwise wrap the wrappers
+    return cls.__dict__.get('_lod_paint', cls.paint)
+
+
+def install(nodz_main, config=None):
+    """
+    Wrap the paint methods of the Nodz NodeItem, PlugItem, SocketItem and ConnectionItem classes.
+    Safe to call again, eg after a reload.
+    
+    :param nodz_main: the Nodz module
+    :param config: Nodz config dict, for the display limits and colours
+    """
+    if config:
+        LIMITS['title'] = config.get('node_title_display_limit', LIMITS['title'])
+        LIMITS['attributes'] = config.get('attributes_display_limit', LIMITS['attributes'])
+        if 'attr_preset_2' in config:
+            OFFLINE_COLOR.setRgb(*config['attr_preset_2']['bg'])
+    
+    node_paint = original_paint(nodz_main.NodeItem)
+    
+    def paint_node(self, painter, option, widget=None):
+        width = screen_width(self, painter, option)
+        if width >= LIMITS['attributes']:
+            # Nodz draws the name. swap the label in while it does
+            name = self.name
+            self.name = node_label(self)
+            try:
+                return node_paint(self, painter, option, widget)
+            finally:
+                self.name = name
+        
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+        rect = self.boundingRect()
+        painter.setBrush(self._brush)
+        if 'OFFLINE' in self.attrs:
+            painter.setPen(QtGui.QPen(OFFLINE_COLOR, self.pen.width()))
+        else:
+            painter.setPen(self.pen)
+        painter.drawRect(rect)
+        
+        if width >= LIMITS['title']:
+            painter.setPen(self._textPen)
+            painter.setFont(self._nodeTextFont)
+            title = QtCore.QRectF(rect.x(), rect.y(), rect.width(), self.baseHeight)
+            painter.drawText(title, QtCore.Qt.AlignCenter, node_label(self))
+    
+    nodz_main.NodeItem._lod_paint = node_paint
+    nodz_main.NodeItem.paint = paint_node
+    
+    # plugs and sockets go with the attribute rows
+    for cls in [nodz_main.PlugItem, nodz_main.SocketItem]:
+        slot_paint = original_paint(cls)
+        
+        def paint_slot(self, painter, option, widget=None, slot_paint=slot_paint):
+            node = self.parentItem()
+            if node is not None and screen_width(node, painter, option) < LIMITS['attributes']:
+                return
+            slot_paint(self, painter, option, widget)
+        
+        cls._lod_paint = slot_paint
+        cls.paint = paint_slot
+    
+    connection_paint = original_paint(nodz_main.ConnectionItem)
+    
+    def paint_connection(self, painter, option, widget=None):
+        # a connection's bounding rect says nothing about how zoomed in the view is. use the scale itself
+        if option.levelOfDetailFromTransform(painter.worldTransform()) * LIMITS['attributes'] < LIMITS['title']:
+            painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+        connection_paint(self, painter, option, widget)
+    
+    nodz_main.ConnectionItem._lod_paint = connection_paint
+    nodz_main.ConnectionItem.paint = paint_connection
+
+
+def optimize_view(view):
+    """
+    Settings for a graph view that's going to hold a lot of items
+    
+    :param view: QGraphicsView. the Nodz widget
+    """
+    view.setViewportUpdateMode(QtWidgets.QGraphicsView.SmartViewportUpdate)
+    # the painter state is still saved for each item. the wrappers above change render hints
+    view.setOptimizationFlag(QtWidgets.QGraphicsView.DontAdjustForAntialiasing, True)
+
+
+def cache_item(item):
+    """
+    Draw the item from a cached pixmap until it changes or the view zooms
+    
+    :param item: QGraphicsItem
+    """
+    item.setCacheMode(QtWidgets.QGraphicsItem.DeviceCoordinateCache)
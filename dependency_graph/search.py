@@ -0,0 +1,107 @@
+"""
+Substring search over node labels and paths, fast enough to run on every keystroke.
+No Qt in here.
+"""
+from collections import defaultdict
+
+
+GRAM = 3
+
+
+def grams(text):
+    """
+    :return: set of the GRAM long substrings of text
+    """
+    return set(text[i:i + GRAM] for i in range(len(text) - GRAM + 1))
+
+
+class SearchIndex(object):
+    """
+    Trigram index of the (lowercased) text of each key.
+    
+    A query of three or more characters only looks at the keys that have all of its trigrams,
+    then checks those for the whole query. Shorter queries check every key.
+    The results of the last query are kept, and a query that contains the last one (ie, you kept
+    typing) only has to narrow those down.
+    """
+    
+    
+    def __init__(self):
+        # key: lowercased text
+        self._texts = {}
+        # trigram: set of keys
+        self._grams = defaultdict(set)
+        self._last_query = None
+        self._last_results = None
+    
+    
+    def __len__(self):
+        return len(self._texts)
+    
+    
+    def __contains__(self, key):
+        return key in self._texts
+    
+    
+    def add(self, key, *texts):
+        """
+        :param key: what a search hands back. eg a node path
+        :param texts: strings to search in. eg the node's label and path
+        """
+        if key in self._texts:
+            self.remove(key)
+        # a file name is already in its path. no point indexing it twice
+        texts = [t for t in texts if not any(t in other for other in texts if other is not t)] or texts[:1]
+        text = '\n'.join(texts).lower()
+        self._texts[key] = text
+        for gram in grams(text):
+            self._grams[gram].add(key)
+        self._last_query = None
+    
+    
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in grams(text):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+        self._last_query = None
+    
+    
+    def clear(self):
+        self._texts.clear()
+        self._grams.clear()
+        self._last_query = None
+    
+    
+    def search(self, query):
+        """
+        :param query: text to look for, anywhere in a key's texts. case insensitive
+        :return: set of matching keys
+        """
+        query = query.lower()
+        if not query:
+            return set()
+        
+        if self._last_query is not None and self._last_query in query:
+            # typing more can only ever narrow things down
+            candidates = self._last_results
+        elif len(query) >= GRAM:
+            candidates = None
+            # smallest first, so the intersections stay small
+            for keys in sorted((self._grams.get(gram, set()) for gram in grams(query)), key=len):
+                candidates = set(keys) if candidates is None else candidates & keys
+                if not candidates:
+                    break
+        else:
+            candidates = self._texts
+        
+        texts = self._texts
+        results = set(key for key in candidates if query in texts[key])
+        self._last_query = query
+        self._last_results = results
+        return results
@@ -1,4 +1,15 @@
+import os
 import os.path
+import threading
+
+try:
+    from os import scandir
+except ImportError:
+    # python 2. the scandir backport is optional
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
 
 
 escape_dict = {
@@ -48,3 +59,83 @@ def sanitize_path(in_path):
     #in_path = os.path.normpath(in_path)
     in_path = in_path.replace('\\', '/')
     return in_path
+
+
+def frame_ranges(frames):
+    """
+    Collapse frame numbers into a readable list of ranges
+    [1001, 1002, 1003, 1010] -> '1001-1003, 1010'
+    
+    :param frames: iterable of int frame numbers. None entries are skipped
+    :return: str
+    """
+    frames = sorted(set(f for f in frames if f is not None))
+    ranges = []
+    for frame in frames:
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return ', '.join(str(first) if first == last else '%d-%d' % (first, last) for first, last in ranges)
+
+
+class FileExistence(object):
+    """
+    Cached, batched existence checks. A stand-in for os.path.isfile over a whole walk.
+    
+    The first lookup in a directory lists that directory once, and every lookup after that
+    is a set membership test. A walk that checks thousands of files in a handful of
+    directories does a handful of listings instead of thousands of stats.
+    Without scandir, directories inside a listing count as files.
+    """
+    
+    def __init__(self):
+        self.lookups = 0
+        self.listings = 0
+        self._dirs = {}
+        self._lock = threading.Lock()
+    
+    
+    def _listdir(self, dirname):
+        """
+        :return: set of normcased file names in dirname. empty if it can't be read
+        """
+        # relative paths split into an empty dirname. list the working directory for those
+        dirname = os.path.abspath(dirname)
+        files = self._dirs.get(dirname)
+        if files is not None:
+            return files
+        
+        self.listings += 1
+        try:
+            if scandir is not None:
+                files = set(os.path.normcase(entry.name) for entry in scandir(dirname) if entry.is_file())
+            else:
+                files = set(os.path.normcase(name) for name in os.listdir(dirname))
+        except OSError:
+            files = set()
+        self._dirs[dirname] = files
+        return files
+    
+    
+    def isfile(self, path):
+        """
+        :param path: file path
+        :return: True if the file exists
+        """
+        if not path:
+            return False
+        dirname, basename = os.path.split(os.path.abspath(path))
+        with self._lock:
+            self.lookups += 1
+            return os.path.normcase(basename) in self._listdir(dirname)
+    
+    
+    def missing(self, paths):
+        """
+        Check a batch of paths, eg all the frames of a clip sequence
+        
+        :param paths: list of file paths
+        :return: list of the paths that don't exist, in the order given
+        """
+        return [path for path in paths if not self.isfile(path)]
@@ -0,0 +1,1357 @@
+import itertools
+import logging
+import os.path
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+from pxr import Usd, Sdf, Ar, Pcp
+
+import utils
+from graph import DependencyGraph
+
+
+digitSearch = re.compile(r'\b\d+\b')
+
+logger = logging.getLogger('usd-dependency-graph')
+logger.setLevel(logging.DEBUG)
+if not len(logger.handlers):
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+    logger.addHandler(ch)
+logger.propagate = False
+
+# composed: open a UsdStage and walk the composed prims. exact, but slow on big stages
+# layers: read the authored asset paths straight from each layer's specs. no composition at all
+WALK_MODES = ['composed', 'layers']
+
+# how the composed mode gets the arcs of each prim
+# specs: read the references and payloads authored on every spec in the prim stack
+# pcp: walk the prim index that composition already built. only the arcs that are actually used
+PRIM_ENGINES = ['specs', 'pcp']
+
+# pcp arcs that can cross into another layer stack. variants and relocates never do
+PCP_ARCS = {
+    Pcp.ArcTypeReference: 'reference',
+    Pcp.ArcTypePayload: 'payload',
+    Pcp.ArcTypeInherit: 'inherit',
+    Pcp.ArcTypeSpecialize: 'specialize',
+}
+
+# prim spec field each of those arcs is authored in
+PCP_ARC_FIELDS = {
+    'reference': 'references',
+    'payload': 'payload',
+    'inherit': 'inheritPaths',
+    'specialize': 'specializes',
+}
+
+
+class WalkCancelled(Exception):
+    pass
+
+
+def layer_key(layer):
+    """
+    :param layer: SdfLayer
+    :return: the layer's node path. the same normalised path the layer walk uses for it
+    """
+    if layer.realPath:
+        return os.path.normpath(layer.realPath)
+    # anonymous layers
+    return layer.identifier
+
+
+def clip_sequence_name(firstFile, lastFile):
+    """
+    Name a clip sequence after its first and last files. path/basename.1001.usd and
+    path/basename.1100.usd become path/basename.1001-1100.usd
+    
+    @todo: subframe handling
+    integer frames: path/basename.###.usd
+    subinteger frames: path/basename.##.##.usd.
+    
+    @todo: non-1 increments
+    """
+    firstNums = digitSearch.findall(os.path.basename(firstFile))
+    lastNums = digitSearch.findall(os.path.basename(lastFile))
+    if not firstNums or not lastNums:
+        # no frame numbers to speak of
+        return firstFile
+    
+    firstFileNum = firstNums[-1]
+    digitRange = str(firstNums[-1] + '-' + lastNums[-1])
+    
+    dirname, basename = os.path.split(firstFile)
+    firstFileParts = basename.split(firstFileNum)
+    nodeName = ''
+    for i in range(len(firstFileParts) - 1):
+        nodeName += str(firstFileParts[i])
+    
+    nodeName += digitRange
+    nodeName += firstFileParts[-1]
+    return os.path.join(dirname, nodeName)
+
+
+def clip_frame_number(path):
+    """
+    :return: int frame number of a clip file, or None
+    """
+    nums = digitSearch.findall(os.path.basename(path))
+    if not nums:
+        return None
+    return int(nums[-1])
+
+
+def listop_items(list_op):
+    """
+    Every item in every list of a SdfListOp
+    
+    :param list_op: SdfReferenceListOp, SdfPayloadListOp...
+    :return: list of items
+    """
+    items = []
+    for itemlist in [list_op.appendedItems, list_op.explicitItems, list_op.addedItems,
+                     list_op.prependedItems, list_op.orderedItems]:
+        if itemlist:
+            items.extend(itemlist)
+    return items
+
+
+class AnchorCache(object):
+    """
+    LRU memo of Ar.GetResolver().AnchorRelativePath, keyed on (anchor, asset path).
+    Instanced and set dressed stages anchor the same handful of paths thousands of times.
+    hits and misses are kept so the savings can be checked.
+    """
+    
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+    
+    
+    def anchor(self, anchor, asset_path):
+        """
+        :param anchor: identifier of the layer the asset path was authored in
+        :param asset_path: asset path as authored
+        :return: anchored path
+        """
+        key = (anchor, asset_path)
+        with self._lock:
+            path = self._cache.pop(key, None)
+            if path is not None:
+                self.hits += 1
+                # back on the end as the most recently used
+                self._cache[key] = path
+                return path
+            self.misses += 1
+        
+        path = Ar.GetResolver().AnchorRelativePath(anchor, asset_path)
+        with self._lock:
+            self._cache[key] = path
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return path
+
+
+class DependencyWalker(object):
+    def __init__(self, usdfile, mode='composed', workers=4, cache=None, progress=None, max_depth=None,
+                 payload_depth=0, payload_paths=None, prim_paths=None, engine='specs'):
+        """
+        :param usdfile: path of the root usd file
+        :param mode: one of WALK_MODES
+        :param workers: number of threads used to open layers in layers mode. 1 walks serially
+        :param cache: optional cache.ArcCache. layers that haven't changed since they were cached
+                      aren't opened at all
+        :param progress: optional callback, called every progress_interval seconds during the walk
+                         with (counts, new nodes, new edges). counts is a dict of layers / prims / arcs,
+                         the nodes and edges are the ones found since the last call (see
+                         DependencyGraph.added_since). called from whatever thread is walking
+        :param max_depth: only open layers this many arcs down from the root. layers that are found
+                          but not opened get expanded=False in their info, and can be walked later
+                          with expand(). None walks everything
+        :param payload_depth: composed mode. how many levels of nested payloads the stage loads.
+                              0 loads none - the payload arcs are still read from the unloaded prims,
+                              but nothing inside a payload gets composed. None loads everything
+        :param payload_paths: composed mode. prim paths to load every payload under, on top of payload_depth
+        :param prim_paths: composed mode. only walk the prims under these paths. the stage is opened with a
+                           population mask, so the rest of the stage isn't composed at all
+        :param engine: composed mode. one of PRIM_ENGINES
+        """
+        if not mode in WALK_MODES:
+            raise ValueError("Unknown walk mode: %s" % mode)
+        if not engine in PRIM_ENGINES:
+            raise ValueError("Unknown prim engine: %s" % engine)
+        
+        self.usdfile = usdfile
+        # graph key of the root node
+        self.root = os.path.normpath(os.path.abspath(usdfile))
+        self.mode = mode
+        self.workers = workers
+        self.cache = cache
+        self.progress = progress
+        self.max_depth = max_depth
+        self.payload_depth = payload_depth
+        self.payload_paths = payload_paths or []
+        self.prim_paths = prim_paths or []
+        self.engine = engine
+        if self.prim_paths and mode != 'composed':
+            logger.warning('prim paths are ignored in {} mode'.format(mode))
+        # layers expanded by hand. they get expanded again when the file is re-walked
+        self.expansions = []
+        self.progress_interval = 0.2
+        # set from any thread to stop the walk. checked as the walk goes
+        self._cancel = threading.Event()
+        
+        logger.info('DependencyWalker'.center(40, '-'))
+        logger.info('loading usd file: {} ({} mode, {} engine)'.format(self.usdfile, self.mode, self.engine))
+        self._reset()
+    
+    
+    def _reset(self):
+        """
+        Set up the state a walk builds. Everything a walk fills in starts out here, for a new walker and
+        at the start of every walk
+        """
+        self.graph = DependencyGraph()
+        self.stage = None
+        # resolved paths of the layers the stage has loaded
+        self.used_layers = set()
+        # every online check in the walk goes through here, so each directory is listed once
+        self.exists = utils.FileExistence()
+        # (anchor layer, asset path) pairs repeat a lot. resolve each one once per walk
+        self.anchors = AnchorCache()
+        # clip sequence node: [(anchor layer, [frame asset paths])]
+        self.clip_frames = {}
+        self.cycles = []
+        self.timings = {}
+        self.counts = {'layers': 0, 'prims': 0, 'arcs': 0}
+        # (prototype path, path of the prototype the instances are in or None, layers authoring the
+        # instances' arcs): set of the (src, dst, arc type) edges those instances bring in. the layers are
+        # None for the set that holds the arcs inside the prototype
+        self.prototype_arcs = OrderedDict()
+        # prototype_arcs key: number of instances it stands in for
+        self.instance_counts = {}
+        # the prototype_arcs set that's being filled in
+        self._prototype = None
+        # prims the pcp engine handed over to walkPrim
+        self.pcp_fallbacks = 0
+        # (introducing layer, target layer, arc type) the pcp engine has made nodes for
+        self._pcp_arcs = set()
+        # layers whose arcs have been followed
+        self.expanded = set()
+        self._last_report = time.time()
+        self._report_mark = None
+    
+    
+    def cancel(self):
+        """
+        Ask a running walk to stop. start() raises WalkCancelled the next time it checks
+        """
+        self._cancel.set()
+    
+    
+    def report(self, force=False):
+        """
+        Check for cancellation, and pass anything new on to the progress callback if it's been long enough
+        
+        :param force: report now, no matter when the last one was
+        """
+        if self._cancel.is_set():
+            raise WalkCancelled(self.usdfile)
+        if self.progress is None:
+            return
+        now = time.time()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        self.counts['arcs'] = self.graph.edge_count()
+        nodes, edges, self._report_mark = self.graph.added_since(self._report_mark)
+        self.progress(dict(self.counts), nodes, edges)
+    
+    
+    @contextmanager
+    def timed(self, phase):
+        """
+        Record how long the wrapped block takes in self.timings
+        
+        :param phase: name of the walk phase
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.time() - start
+    
+    
+    def start(self, reload=False):
+        """
+        Walk the file, building self.graph
+        
+        :param reload: in composed mode, keep the stage from the last walk and only reload the layers
+                       that have changed on disk, instead of composing everything from scratch
+        :raises WalkCancelled: if cancel() is called during the walk. opening the stage can't be
+                               interrupted, the layer and prim walks stop within a layer or 100 prims.
+                               the graph and everything else from the last walk are put back, so
+                               self.graph is never a half built one
+        """
+        stage = self.stage if reload else None
+        
+        # everything _reset replaces. the attributes are swapped out, not changed, so a shallow copy will do
+        previous = dict(self.__dict__)
+        self._reset()
+        self._cancel.clear()
+        try:
+            self._walk(stage)
+        except BaseException:
+            self.__dict__.update(previous)
+            raise
+    
+    
+    def _walk(self, stage):
+        """
+        The walk itself. See start()
+        
+        :param stage: UsdStage from the last walk to reload, or None to open the file
+        """
+        with self.timed('open'):
+            if self.mode == 'layers':
+                # layers get opened as the walk gets to them
+                root_path = os.path.normpath(os.path.abspath(self.usdfile))
+            elif stage is not None:
+                # SdfLayer.Reload skips anything that hasn't changed since it was read
+                stage.Reload()
+                self.stage = stage
+                # payloads that turned up in the reloaded layers
+                self.loadPayloads(self.stage)
+                root_path = os.path.normpath(self.stage.GetRootLayer().realPath)
+            else:
+                # the stage is composed exactly once per walk
+                # both the layer walk and the prim walk read from it
+                # opened by its absolute path, so the layer identifiers everything is anchored to are absolute too
+                # composing every payload just to read their asset paths is most of the time and memory on a
+                # heavy shot. the payload arcs are on the unloaded prims anyway
+                load = Usd.Stage.LoadAll if self.payload_depth is None else Usd.Stage.LoadNone
+                path = self.root if os.path.isfile(self.root) else self.usdfile
+                if self.prim_paths:
+                    mask = Usd.StagePopulationMask([Sdf.Path(prim_path) for prim_path in self.prim_paths])
+                    self.stage = Usd.Stage.OpenMasked(path, mask, load)
+                else:
+                    self.stage = Usd.Stage.Open(path, load)
+                self.loadPayloads(self.stage)
+                root_path = os.path.normpath(self.stage.GetRootLayer().realPath)
+        
+        if self.stage:
+            self.used_layers = set(layer_key(layer) for layer in self.stage.GetUsedLayers())
+        
+        # nodes are keyed on their full, normalised path. the root has to match what the layers resolve to
+        self.root = root_path
+        info = {}
+        info['mute'] = False
+        info['online'] = self.exists.isfile(root_path)
+        info['path'] = root_path
+        info['type'] = 'layer'
+        self.graph.add_node(root_path, info)
+        
+        with self.timed('layers'):
+            self.walkStageLayers(root_path)
+        if self.stage:
+            with self.timed('prims'):
+                self.walkStagePrims(self.stage)
+        if self.max_depth is not None or self.stage is not None:
+            # in composed mode, that's the layers the stage didn't load. unloaded payloads, unselected variants...
+            self.markUnexpanded()
+            # put back what was expanded by hand before a re-walk. in order, as some
+            # of them will only have turned up from expanding the ones before
+            for path in self.expansions:
+                self.expand(path)
+        self.report(force=True)
+        
+        if self.cache is not None:
+            self.cache.commit()
+            logger.info('arc cache: {} hits, {} misses'.format(self.cache.hits, self.cache.misses))
+        logger.info('file checks: {} lookups, {} directory listings'.format(self.exists.lookups,
+                                                                           self.exists.listings))
+        logger.info('anchored paths: {} hits, {} misses'.format(self.anchors.hits, self.anchors.misses))
+        if self.engine == 'pcp' and self.stage:
+            logger.info('pcp engine: {} prims read from their specs'.format(self.pcp_fallbacks))
+        self.log_timings()
+    
+    
+    def loadPayloads(self, stage):
+        """
+        Load the payloads payload_depth and payload_paths ask for, on a stage opened with LoadNone
+        
+        :param stage: UsdStage
+        """
+        if self.payload_depth is None:
+            return
+        
+        if self.payload_paths:
+            stage.LoadAndUnload(set(Sdf.Path(path) for path in self.payload_paths), set(),
+                                Usd.LoadWithDescendants)
+        
+        for depth in range(self.payload_depth):
+            # the payloads inside the ones just loaded only show up once they're composed
+            unloaded = set(path for path in stage.FindLoadable() if not stage.GetPrimAtPath(path).IsLoaded())
+            if not unloaded:
+                break
+            stage.LoadAndUnload(unloaded, set(), Usd.LoadWithoutDescendants)
+        
+        loaded = stage.GetLoadSet()
+        logger.info('loaded {} of {} payloads'.format(len(loaded), len(stage.FindLoadable())))
+    
+    
+    def log_timings(self):
+        total = sum(self.timings.values())
+        for phase in ['open', 'layers', 'prims']:
+            if phase in self.timings:
+                logger.info('{:>8}: {:.3f}s'.format(phase, self.timings[phase]))
+        logger.info('{:>8}: {:.3f}s ({} nodes, {} edges)'.format('total', total, len(self.graph),
+                                                               self.graph.edge_count()))
+    
+    
+    def layerArcs(self, layer, layer_path):
+        """
+        The outgoing layer arcs of a single layer. External references come first, then sublayers.
+        
+        :param layer: SdfLayer
+        :param layer_path: resolved path of the layer
+        :return: list of [resolved path, asset path as authored, node type]
+        """
+        layer_basepath = os.path.dirname(layer_path)
+        arcs = []
+        # GetExternalReferences includes the sublayers too. they get their own arc type
+        sublayers = set(layer.subLayerPaths)
+        
+        for ref in layer.GetExternalReferences():
+            if not ref or ref in sublayers:
+                # sometimes a ref can be a zero length string. whyyyyyyyyy?
+                # seeing this in multiverse esper_room example
+                continue
+            
+            # if you wanna construct a full path yourself
+            # you can manually load a SdfLayer with Sdf.Layer.Find(refpath)
+            
+            # or you can use FindRelativeToLayer to do the dirty work
+            # seems to operate according to the composition rules (variants blah blah)
+            # ie, it *may* not return a layer if the stage is set to not load that layer
+            # sub_layer = Sdf.Layer.FindRelativeToLayer(layer, ref)
+            refpath = os.path.normpath(os.path.join(layer_basepath, ref))
+            arcs.append([refpath, ref, 'layer'])
+        
+        for ref in layer.subLayerPaths:
+            if not ref:
+                # going to guard against zero length strings here too
+                continue
+            
+            refpath = os.path.normpath(os.path.join(layer_basepath, ref))
+            arcs.append([refpath, ref, 'sublayer'])
+        
+        return arcs
+    
+    
+    def scanLayer(self, layer, layer_path):
+        """
+        The outgoing arcs of a single layer, read straight from its specs. Used by the layers mode.
+        Nothing gets composed - the arcs are whatever is authored in this layer, including the
+        payloads inside every variant, whether it's selected or not.
+        Paths are anchored to the layer identifier, same as the composed prim walk.
+        Value clips aren't picked up in this mode.
+        
+        :param layer: SdfLayer
+        :param layer_path: resolved path of the layer
+        :return: list of [resolved path, asset path as authored, arc type]
+        """
+        anchor = layer.identifier
+        arcs = []
+        found = set()
+        
+        def add_arc(ref, arc_type):
+            refpath = os.path.normpath(self.anchors.anchor(anchor, ref))
+            if not (refpath, arc_type) in found:
+                found.add((refpath, arc_type))
+                arcs.append([refpath, ref, arc_type])
+        
+        sublayers = [ref for ref in layer.subLayerPaths if ref]
+        for ref in sublayers:
+            add_arc(ref, 'sublayer')
+        
+        # GetExternalReferences is cheap, but doesn't say what kind of arc each path is.
+        # only go through the specs when there's something other than sublayers in there
+        externals = [ref for ref in layer.GetExternalReferences() if ref and not ref in sublayers]
+        if not externals:
+            return arcs
+        
+        def visit(path):
+            if not (path.IsPrimPath() or path.IsPrimVariantSelectionPath()):
+                return
+            # variant selection paths give us the prim spec inside the variant
+            spec = layer.GetPrimAtPath(path)
+            if not spec:
+                return
+            if spec.hasReferences:
+                for reference in listop_items(spec.referenceList):
+                    if reference.assetPath:
+                        add_arc(reference.assetPath, 'reference')
+            if spec.hasPayloads:
+                for payload in listop_items(spec.payloadList):
+                    if payload.assetPath:
+                        add_arc(payload.assetPath, 'payload')
+        
+        layer.Traverse(Sdf.Path.absoluteRootPath, visit)
+        
+        # anything the specs didn't account for is still a dependency
+        typed = set(arc[1] for arc in arcs)
+        for ref in externals:
+            if not ref in typed:
+                add_arc(ref, 'layer')
+        
+        return arcs
+    
+    
+    def openLayer(self, layer_path, mode=None):
+        """
+        Find or open a layer and get its outgoing arcs.
+        Safe to call from the worker threads - it doesn't touch the graph.
+        
+        :param layer_path: resolved path of the layer
+        :param mode: how to find the arcs. one of WALK_MODES, defaults to self.mode
+        :return: list of arcs, or None if the layer can't be found
+        """
+        mode = mode or self.mode
+        if mode == 'composed' and not layer_path in self.used_layers:
+            # not part of the composed stage, eg an unloaded payload. even if it's cached, or still
+            # open from something else
+            return None
+        if self.cache is not None:
+            arcs = self.cache.get(layer_path, mode)
+            if arcs is not None:
+                return arcs
+        
+        if mode == 'layers':
+            layer = Sdf.Layer.FindOrOpen(layer_path)
+            if not layer:
+                return None
+            arcs = self.scanLayer(layer, layer_path)
+        else:
+            # the stage has already loaded everything it's going to use
+            layer = Sdf.Layer.Find(layer_path)
+            if not layer:
+                return None
+            arcs = self.layerArcs(layer, layer_path)
+        
+        if self.cache is not None:
+            self.cache.put(layer_path, mode, arcs)
+        return arcs
+    
+    
+    def layerNode(self, refpath, ref, node_type):
+        """
+        Add a node for a layer found by the layer walk, if there isn't one already
+        
+        :return: True if it's a new node
+        """
+        if self.graph.has_node(refpath):
+            return False
+        info = {}
+        info['mute'] = self.stage.IsLayerMuted(ref) if self.stage else False
+        info['online'] = self.exists.isfile(refpath)
+        info['path'] = refpath
+        info['type'] = node_type
+        
+        self.graph.add_node(refpath, info)
+        return True
+    
+    
+    def markUnexpanded(self):
+        """
+        Flag the nodes a depth limited walk found but didn't open with expanded=False
+        """
+        for path, info in list(self.graph.nodes()):
+            if info['online'] and info['type'] != 'clip' and not path in self.expanded and not 'expanded' in info:
+                # a new info dict, so anything holding the old one can tell it's changed
+                self.graph.add_node(path, dict(info, expanded=False))
+    
+    
+    def expand(self, path):
+        """
+        Walk the arcs of one layer that a depth limited walk left unexpanded. Only this layer is opened -
+        its arcs are read from its specs, same as the layers mode, and the new nodes are left unexpanded.
+        
+        :param path: path of an unexpanded node
+        :return: list of paths of the new nodes
+        """
+        info = self.graph.node(path)
+        if info is None or not info.get('expanded') is False:
+            return []
+        
+        if not path in self.expansions:
+            self.expansions.append(path)
+        arcs = self.openLayer(path, mode='layers')
+        self.expanded.add(path)
+        # a new info dict, so anything holding the old one can tell it's changed
+        info = dict(info)
+        del info['expanded']
+        self.graph.add_node(path, info)
+        
+        new_nodes = []
+        for refpath, ref, node_type in arcs or []:
+            if self.layerNode(refpath, ref, node_type):
+                new_nodes.append(refpath)
+            self.graph.add_edge(path, refpath, node_type)
+        self.markUnexpanded()
+        
+        logger.info('expanded {}: {} new nodes'.format(path, len(new_nodes)))
+        return new_nodes
+    
+    
+    def update(self, paths):
+        """
+        Re-read just the layers that have changed on disk and patch the graph from the last walk, rather than
+        walking everything again. Layers mode only - in composed mode a change to any layer can recompose the
+        whole stage, so that's start(reload=True).
+        Layers that were opened stay open even if a change has moved them past max_depth.
+        
+        :param paths: resolved paths of the changed layers
+        :raises WalkCancelled: same as start(). the graph from the last walk is put back
+        """
+        if self.mode != 'layers':
+            raise ValueError("Only a layers mode walk can be updated: %s" % self.mode)
+        
+        previous = dict(self.__dict__)
+        # the graph from the last walk is still in use. patch a copy of it
+        self.graph = DependencyGraph.from_dict(self.graph.to_dict())
+        self.expanded = set(self.expanded)
+        self.cycles = list(self.cycles)
+        self.exists = utils.FileExistence()
+        self.timings = {}
+        self.counts = {'layers': 0, 'prims': 0, 'arcs': 0}
+        self._last_report = time.time()
+        # only what the update adds gets reported
+        self._report_mark = self.graph.added_since()[2]
+        self._cancel.clear()
+        try:
+            with self.timed('layers'):
+                self._update(paths)
+            self.report(force=True)
+        except BaseException:
+            self.__dict__.update(previous)
+            raise
+        
+        if self.cache is not None:
+            self.cache.commit()
+        logger.info('updated {} changed layers: {} layers read'.format(len(paths), self.counts['layers']))
+        self.log_timings()
+    
+    
+    def _update(self, paths):
+        """
+        The update itself. See update()
+        """
+        for path in paths:
+            # open layers are cached by Sdf. drop what was read last time
+            layer = Sdf.Layer.Find(path)
+            if layer:
+                layer.Reload()
+        
+        depths = self.layerDepths()
+        for path in sorted(paths):
+            info = self.graph.node(path)
+            if info is None or not path in depths:
+                # not a dependency. if a changed layer has made it one, it's been read fresh
+                continue
+            self.report()
+            
+            online = self.exists.isfile(path)
+            if online != info['online']:
+                # a new info dict, so anything holding the old one can tell it's changed
+                info = dict(info, online=online)
+                self.graph.add_node(path, info)
+            too_deep = self.max_depth is not None and depths[path] >= self.max_depth
+            if not path in self.expanded and (not online or too_deep):
+                # never opened and still not going to be
+                continue
+            
+            arcs = self.openLayer(path) if online else None
+            self.counts['layers'] += 1
+            found = set((refpath, node_type) for refpath, ref, node_type in arcs or [])
+            for src, dst, arc_type in self.graph.out_edges(path):
+                if not (dst, arc_type) in found:
+                    self.graph.remove_edge(src, dst, arc_type)
+            if arcs is None:
+                self.expanded.discard(path)
+                continue
+            
+            ancestors = self.reachable(path, reverse=True)
+            self.walkStageLayers(path, arcs, depth=depths[path], ancestors=ancestors, depths=depths)
+        
+        # whatever the changed layers no longer point at, directly or not
+        reachable = self.reachable(self.root)
+        removed = [path for path, info in self.graph.nodes() if not path in reachable]
+        for path in removed:
+            self.graph.remove_node(path)
+            self.expanded.discard(path)
+        self.cycles = [[src, dst] for src, dst in self.cycles
+                       if any(edge[1] == dst for edge in self.graph.out_edges(src))]
+        
+        # layers that a changed one has brought within max_depth
+        for path, info in list(self.graph.nodes()):
+            if path in self.expanded and 'expanded' in info:
+                info = dict(info)
+                del info['expanded']
+                self.graph.add_node(path, info)
+        if self.max_depth is not None:
+            self.markUnexpanded()
+    
+    
+    def layerDepths(self):
+        """
+        :return: dict of path: fewest arcs between the root and that node
+        """
+        depths = {self.root: 0}
+        queue = deque([self.root])
+        while queue:
+            path = queue.popleft()
+            for src, dst, arc_type in self.graph.out_edges(path):
+                if not dst in depths:
+                    depths[dst] = depths[path] + 1
+                    queue.append(dst)
+        return depths
+    
+    
+    def reachable(self, path, reverse=False):
+        """
+        :param path: node path to start from
+        :param reverse: go back up the arcs instead, to find everything that leads to path
+        :return: set of paths reachable from path, including itself
+        """
+        found = set([path])
+        stack = [path]
+        while stack:
+            node = stack.pop()
+            edges = self.graph.in_edges(node) if reverse else self.graph.out_edges(node)
+            for src, dst, arc_type in edges:
+                other = src if reverse else dst
+                if not other in found:
+                    found.add(other)
+                    stack.append(other)
+        return found
+    
+    
+    def walkStageLayers(self, root_path, root_arcs=None, depth=0, ancestors=(), depths=None):
+        """
+        Walk the layer graph below the root layer, following external references and sublayers.
+        
+        Every layer is expanded exactly once, keyed on its resolved path, no matter how many
+        layers point at it. The walk uses an explicit stack rather than recursion so deep
+        layer chains can't run into the recursion limit.
+        An arc that points back at a layer that is still being expanded is a cycle. It is kept
+        as an edge flagged with cycle=True and also recorded in self.cycles.
+        
+        In composed mode the layers are already loaded by the stage and the arcs come from
+        layerArcs. In layers mode each layer is opened here and scanned with scanLayer.
+        Opening is the slow part, so in layers mode the children of each expanded layer are
+        handed to a pool of self.workers threads straight away. The walk itself still runs in
+        the same order on this thread, so the graph comes out identical to a serial walk.
+        
+        With max_depth, a layer that turns up closer to the root than where it was expanded is walked
+        again from there, so its subtree isn't cut short by the longer route that got to it first.
+        
+        Also used by update() to walk below a layer that's changed. Layers expanded by an earlier walk
+        aren't expanded again, unless they turn up closer to the root than in depths.
+        
+        :param root_path: resolved path of the layer to start from
+        :param root_arcs: arcs of the start layer, if it's already been read
+        :param depth: how many arcs down from the root the start layer is
+        :param ancestors: layers that lead to the start layer. an arc back to one of these is a cycle
+        :param depths: dict of path: depth the layers of an earlier walk were expanded at
+        :return: number of new nodes found
+        """
+        count = 0
+        if root_arcs is None:
+            root_arcs = self.openLayer(root_path)
+            if root_arcs is None:
+                raise RuntimeError("Cannot open layer: %s" % root_path)
+            self.counts['layers'] += 1
+        
+        # layers that have been tried. self.expanded only gets the ones that could actually be opened
+        visited = set(self.expanded)
+        visited.add(root_path)
+        # path: depth each visited layer was reached at
+        reached = dict(depths or {})
+        reached[root_path] = depth
+        self.expanded.add(root_path)
+        # layers on the current branch of the walk. an arc back to one of these is a cycle
+        branch = set(ancestors)
+        branch.add(root_path)
+        stack = [[root_path, iter(root_arcs)]]
+        
+        pool = None
+        if self.mode == 'layers' and self.workers > 1:
+            pool = ThreadPool(self.workers)
+        # layer path: AsyncResult of openLayer
+        pending = {}
+        
+        def prefetch(arcs, depth):
+            if pool is None or (self.max_depth is not None and depth >= self.max_depth):
+                # the layers at max_depth won't be opened
+                return
+            for refpath, ref, node_type in arcs:
+                if not refpath in visited and not refpath in pending:
+                    pending[refpath] = pool.apply_async(self.openLayer, (refpath,))
+        
+        prefetch(root_arcs, depth + 1)
+        try:
+            while stack:
+                layer_path, arcs = stack[-1]
+                arc = next(arcs, None)
+                if arc is None:
+                    # all arcs of this layer done
+                    stack.pop()
+                    branch.discard(layer_path)
+                    continue
+                
+                refpath, ref, node_type = arc
+                
+                if self.prim_paths and self.stage and node_type == 'layer' and not refpath in self.used_layers:
+                    # a reference or payload on a prim outside the population mask. the prim walk
+                    # picks up the ones inside it, with their arc types
+                    continue
+                
+                if self.layerNode(refpath, ref, node_type):
+                    count += 1
+                
+                if refpath in branch:
+                    logger.warning('layer cycle: {} -> {}'.format(layer_path, refpath))
+                    self.graph.add_edge(layer_path, refpath, node_type, cycle=True)
+                    self.cycles.append([layer_path, refpath])
+                    continue
+                
+                self.graph.add_edge(layer_path, refpath, node_type)
+                
+                ref_depth = len(stack) + depth
+                if refpath in visited and (self.max_depth is None or reached.get(refpath, 0) <= ref_depth):
+                    # already expanded via another layer, at least as close to the root
+                    continue
+                
+                if self.max_depth is not None and ref_depth >= self.max_depth:
+                    # not visited, so it still gets expanded if it turns up closer to the root
+                    continue
+                visited.add(refpath)
+                reached[refpath] = ref_depth
+                
+                if refpath in pending:
+                    sub_arcs = pending.pop(refpath).get()
+                else:
+                    sub_arcs = self.openLayer(refpath)
+                
+                self.counts['layers'] += 1
+                self.report()
+                
+                if sub_arcs is not None:
+                    self.expanded.add(refpath)
+                    prefetch(sub_arcs, ref_depth + 1)
+                    branch.add(refpath)
+                    stack.append([refpath, iter(sub_arcs)])
+        finally:
+            if pool is not None:
+                # anything still pending was reached by another route first
+                pool.terminate()
+                pool.join()
+        
+        return count
+    
+    
+    def walkStagePrims(self, stage):
+        """
+        Loop through every prim on an already composed stage, collecting the prim level arcs
+        (payloads, references, variant payloads and clips)
+        
+        :param stage: UsdStage - the same stage used for the layer walk
+        """
+        # one resolver context for the whole walk, rather than one per arc
+        with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
+            for prim in self.primsToWalk(stage):
+                self.visitPrim(prim)
+        
+        # every instance of a prototype brings in the same arcs
+        instances = {}
+        for key, arcs in self.prototype_arcs.items():
+            for arc in arcs:
+                instances[arc] = instances.get(arc, 0) + self.instance_counts[key]
+        for (src, dst, arc_type), count in instances.items():
+            self.graph.add_edge(src, dst, arc_type, instances=count)
+    
+    
+    def visitPrim(self, prim):
+        """
+        Collect the arcs of a prim, or of an instance's prototype the first time one of its instances turns up
+        
+        :param prim: UsdPrim
+        """
+        if prim.IsInstance():
+            self.walkInstance(prim)
+        else:
+            self.primArcs(prim)
+        self.counts['prims'] += 1
+        if not self.counts['prims'] % 100:
+            self.report()
+    
+    
+    def walkInstance(self, prim):
+        """
+        Instances with the same composition arcs share a prototype. The first instance of each prototype
+        has its own arcs walked, plus every prim inside the prototype. The rest are skipped - they'd only
+        find the same arcs again. The traversal doesn't go inside instances, so without this the prims in
+        a prototype would never be looked at.
+        
+        Instances only share a prototype if the arcs authored on them match, but not where they're
+        authored, and the edges start from the layer that authored them. So the instance's own arcs are
+        walked again for every set of layers authoring them, eg the same asset instanced from two sublayers.
+        The prims inside the prototype are only walked once. The instances on the stage and the ones inside
+        each prototype are kept apart too. The 'instances' counts on the edges are per prototype the
+        instances are in, not multiplied out.
+        
+        :param prim: instance UsdPrim
+        """
+        # GetMaster in older builds
+        prototype = prim.GetPrototype() if hasattr(prim, 'GetPrototype') else prim.GetMaster()
+        context = self.enclosingPrototype(prim)
+        key = (prototype.GetPath(), context, self.arcLayers(prim))
+        interior = (prototype.GetPath(), context, None)
+        for count_key in [key, interior]:
+            self.instance_counts[count_key] = self.instance_counts.get(count_key, 0) + 1
+        if key in self.prototype_arcs:
+            return
+        
+        outer = self._prototype
+        try:
+            self._prototype = self.prototype_arcs[key] = set()
+            self.primArcs(prim)
+            if interior in self.prototype_arcs:
+                return
+            
+            self._prototype = self.prototype_arcs[interior] = set()
+            prims = iter(Usd.PrimRange(prototype, Usd.PrimAllPrimsPredicate))
+            # the prototype root stands in for the instance, which has just been walked
+            next(prims)
+            for child in prims:
+                self.visitPrim(child)
+        finally:
+            self._prototype = outer
+    
+    
+    def arcLayers(self, prim):
+        """
+        :param prim: UsdPrim
+        :return: frozenset of the identifiers of the layers with specs for the prim that author arcs or clips
+        """
+        return frozenset(spec.layer.identifier for spec in prim.GetPrimStack()
+                         if spec.hasReferences or spec.hasPayloads or spec.variantSets or spec.HasInfo('clips'))
+    
+    
+    def enclosingPrototype(self, prim):
+        """
+        :return: path of the prototype the prim is in, or None for a prim on the stage
+        """
+        in_prototype = prim.IsInPrototype() if hasattr(prim, 'IsInPrototype') else prim.IsInMaster()
+        if not in_prototype:
+            return None
+        return prim.GetPath().GetPrefixes()[0]
+    
+    
+    def primArc(self, src, dst, arc_type):
+        """
+        Add an edge found by the prim walk
+        """
+        self.graph.add_edge(src, dst, arc_type)
+        if self._prototype is not None:
+            self._prototype.add((src, dst, arc_type))
+    
+    
+    def primsToWalk(self, stage):
+        """
+        :param stage: UsdStage
+        :return: iterable of every prim on the stage, or just the subtrees under prim_paths
+        """
+        if not self.prim_paths:
+            return stage.TraverseAll()
+        
+        roots = []
+        for path in sorted(Sdf.Path(prim_path) for prim_path in self.prim_paths):
+            if roots and path.HasPrefix(roots[-1]):
+                # already inside the last subtree
+                continue
+            roots.append(path)
+        
+        ranges = []
+        for path in roots:
+            prim = stage.GetPrimAtPath(path)
+            if not prim:
+                logger.warning('no prim at {}'.format(path))
+                continue
+            # same predicate as TraverseAll
+            ranges.append(Usd.PrimRange(prim, Usd.PrimAllPrimsPredicate))
+        return itertools.chain.from_iterable(ranges)
+    
+    
+    def primArcs(self, prim):
+        """
+        Collect the arcs of a single prim with the walker's engine
+        
+        :param prim: UsdPrim
+        """
+        if self.engine == 'pcp':
+            self.walkPrimIndex(prim)
+        else:
+            self.walkPrim(prim)
+    
+    
+    def walkPrimIndex(self, prim):
+        """
+        Collect the arcs of a single prim from its PcpPrimIndex - the tree of arcs composition built for it.
+        Each node that crosses into another layer stack is an arc to that layer stack's root layer. The
+        introducing layer is the strongest layer of the parent's layer stack with the arc authored.
+        Nodes that come from an ancestor prim were recorded with the ancestor. Implied inherits and
+        propagated specializes are copies of arcs found elsewhere in the tree, so they're skipped.
+        
+        Unlike the specs engine this only sees what the stage uses. Unselected variants aren't there,
+        and neither are unloaded payloads or arcs to files that can't be opened - those prims go through
+        walkPrim instead. Expects the stage's resolver context to be bound.
+        
+        :param prim: UsdPrim
+        """
+        index = prim.GetPrimIndex()
+        if (index.hasAnyPayloads and not prim.IsLoaded()) or \
+                any(error.errorType in (Pcp.ErrorType_InvalidAssetPath, Pcp.ErrorType_MutedAssetPath)
+                    for error in index.localErrors):
+            # these arcs never make it into the index. they're only in the specs
+            self.pcp_fallbacks += 1
+            self.walkPrim(prim)
+            return
+        
+        stack = list(index.rootNode.children)
+        while stack:
+            node = stack.pop()
+            if node.origin != node.parent:
+                # implied or propagated. the original is in the tree too
+                continue
+            stack.extend(node.children)
+            
+            arc_type = PCP_ARCS.get(node.arcType)
+            parent = node.parent
+            if arc_type is None or node.IsDueToAncestor() or \
+                    node.layerStack.identifier == parent.layerStack.identifier:
+                continue
+            
+            target = layer_key(node.layerStack.identifier.rootLayer)
+            intro = self.introducingLayer(parent, node.GetIntroPath(), arc_type)
+            if self.max_depth is not None and not intro in self.expanded:
+                # from a layer past the depth limit. expand() reads these from the layer itself
+                continue
+            
+            arc = (intro, target, arc_type)
+            if not arc in self._pcp_arcs:
+                # the node only has to be made once per layer stack
+                self._pcp_arcs.add(arc)
+                info = {}
+                info['online'] = self.exists.isfile(target)
+                info['path'] = target
+                info['type'] = arc_type
+                self.graph.add_node(target, info)
+            if intro != target:
+                self.primArc(intro, target, arc_type)
+        
+        self.primClips(prim)
+    
+    
+    def introducingLayer(self, node, path, arc_type):
+        """
+        :param node: PcpNodeRef the arc was authored at
+        :param path: prim path in the node's layer stack the arc was authored on
+        :param arc_type: PCP_ARCS value
+        :return: node path of the strongest layer in the node's layer stack with the arc authored
+        """
+        layers = node.layerStack.layers
+        if len(layers) > 1:
+            field = PCP_ARC_FIELDS[arc_type]
+            for layer in layers:
+                spec = layer.GetPrimAtPath(path)
+                if spec and spec.HasInfo(field):
+                    return layer_key(layer)
+        return layer_key(node.layerStack.identifier.rootLayer)
+    
+    
+    def walkPrim(self, prim):
+        """
+        Collect the arcs of a single prim. Expects the stage's resolver context to be bound.
+        
+        :param prim: UsdPrim
+        """
+        # print(prim.GetPath())
+        
+        # from the docs:
+        """Return a list of PrimSpecs that provide opinions for this prim (i.e.
+        the prim's metadata fields, including composition metadata).
+         specs are ordered from strongest to weakest opinion."""
+        primStack = prim.GetPrimStack()
+        for spec in primStack:
+            layer_path = layer_key(spec.layer)
+            if self.max_depth is not None and not layer_path in self.expanded:
+                # from a layer past the depth limit. expand() reads these from the layer itself
+                continue
+            
+            if spec.hasPayloads:
+                payloadList = spec.payloadList
+                for itemlist in [payloadList.appendedItems, payloadList.explicitItems,
+                                 payloadList.addedItems,
+                                 payloadList.prependedItems, payloadList.orderedItems]:
+                    if itemlist:
+                        for payload in itemlist:
+                            payload_path = payload.assetPath
+                            
+                            # we resolve the payload path relative to the primSpec layer path (layer.identifier)
+                            # far more likely to be correct. i hope
+                            resolvedpath = os.path.normpath(self.anchors.anchor(spec.layer.identifier, payload_path))
+                            
+                            info = {}
+                            info['online'] = self.exists.isfile(resolvedpath)
+                            info['path'] = resolvedpath
+                            info['type'] = 'payload'
+                            
+                            self.graph.add_node(resolvedpath, info)
+                            if layer_path != resolvedpath:
+                                self.primArc(layer_path, resolvedpath, 'payload')
+            
+            # the docs say there's a HasSpecializes method
+            # no, there is not. at least in this build of houdini 18.0.453
+            # if spec.HasSpecializes:
+            # let's just ignore specialize for the time being
+            """
+            specializesList = spec.specializesList
+            spec_paths = []
+            for itemlist in [specializesList.appendedItems, specializesList.explicitItems,
+                             specializesList.addedItems,
+                             specializesList.prependedItems, specializesList.orderedItems]:
+                if itemlist:
+                    for specialize in itemlist:
+                        specialize_path = specialize.assetPath
+                        with Ar.ResolverContextBinder(stage.GetPathResolverContext()):
+                            resolver = Ar.GetResolver()
+                            resolvedpath = resolver.AnchorRelativePath(spec.layer.identifier, specialize_path)
+                            spec_paths.append(resolvedpath)
+                            ret.append(resolvedpath)
+            
+            if spec_paths:
+                print 'specializesList', spec.specializesList
+            
+            """
+            
+            # references operate the same to payloads
+            if spec.hasReferences:
+                reflist = spec.referenceList
+                for itemlist in [reflist.appendedItems, reflist.explicitItems,
+                                 reflist.addedItems,
+                                 reflist.prependedItems, reflist.orderedItems]:
+                    if itemlist:
+                        for reference in itemlist:
+                            reference_path = reference.assetPath
+                            if reference_path:
+                                # we resolve the payload path relative to the primSpec layer path (layer.identifier)
+                                # far more likely to be correct. i hope
+                                resolvedpath = os.path.normpath(self.anchors.anchor(spec.layer.identifier,
+                                                                                    reference_path))
+                                
+                                info = {}
+                                info['online'] = self.exists.isfile(resolvedpath)
+                                info['path'] = resolvedpath
+                                info['type'] = 'reference'
+                                
+                                self.graph.add_node(resolvedpath, info)
+                                
+                                if layer_path != resolvedpath:
+                                    self.primArc(layer_path, resolvedpath, 'reference')
+            
+            if spec.variantSets:
+                for varset in spec.variantSets:
+                    thisvarset = prim.GetVariantSet(varset.name)
+                    current_variant_name = thisvarset.GetVariantSelection()
+                    current_variant = varset.variants[current_variant_name]
+                    for variant_name in varset.variants.keys():
+                        variant = varset.variants[variant_name]
+                        
+                        # todo: put variant info onto layer
+                        
+                        # for key in variant.GetMetaDataInfoKeys():
+                        #     print key, variant.GetInfo(key)
+                        
+                        # variants that are linked to payloads
+                        # variants can have other mechanisms, but sometimes they're a payload
+                        payloads = variant.GetInfo('payload')
+                        for itemlist in [payloads.appendedItems, payloads.explicitItems, payloads.addedItems,
+                                         payloads.prependedItems, payloads.orderedItems]:
+                            for payload in itemlist:
+                                pathToResolve = payload.assetPath
+                                anchorPath = variant.layer.identifier
+                                resolvedpath = os.path.normpath(self.anchors.anchor(anchorPath, pathToResolve))
+                                if not self.graph.has_node(resolvedpath):
+                                    info = {}
+                                    info['online'] = self.exists.isfile(resolvedpath)
+                                    info['path'] = resolvedpath
+                                    info['type'] = 'payload'
+                                    
+                                    self.graph.add_node(resolvedpath, info)
+                                self.primArc(layer_key(variant.layer), resolvedpath, 'payload')
+            
+            # def, over or class
+            # print 'GetSpecifier', spec.specifier
+            # component,
+            # print 'GetKind', spec.kind
+            # print '--'
+        
+        self.primClips(prim)
+    
+    
+    def primClips(self, prim):
+        """
+        Collect the value clips of a prim
+        
+        :param prim: UsdPrim
+        """
+        # clips - this seems to be the way to do things
+        # clips are not going to be picked up by the stage layers inspection stuff
+        # apparently they're expensive. whatever.
+        # no prim stack shennanigans for us
+        # checking for the metadata first is a lot cheaper than asking the ClipsAPI on every prim
+        if prim.HasAuthoredMetadata('clips'):
+            # dict of clip info for every clip set. full of everything
+            # key is the clip set *name*
+            # GetClipSets seems to be crashing this houdini build - clips.GetClipSets()
+            clip_dict = Usd.ClipsAPI(prim).GetClips()
+            if clip_dict:
+                self.walkClips(prim, clip_dict)
+    
+    
+    def walkClips(self, prim, clip_dict):
+        """
+        Turn the value clips on a prim into clip sequence nodes.
+        All the asset paths come from the one GetClips dict. Nothing is resolved or checked on
+        disk here - the frames are kept in self.clip_frames for validateClips to look at later.
+        
+        :param prim: UsdPrim
+        :param clip_dict: UsdClipsAPI.GetClips()
+        """
+        # the layer that authored the clips. the asset paths are relative to it
+        anchor = None
+        anchor_path = None
+        for spec in prim.GetPrimStack():
+            if spec.HasInfo('clips'):
+                anchor = spec.layer.identifier
+                anchor_path = layer_key(spec.layer)
+                break
+        
+        for clip_set in sorted(clip_dict.keys()):
+            clip_info = clip_dict[clip_set]
+            asset_paths = clip_info.get('assetPaths')
+            if not asset_paths:
+                continue
+            
+            # don't use resolved path in case either the first or last file is missing from disk
+            paths = [str(asset_path.path) for asset_path in asset_paths]
+            first, last = paths[0], paths[-1]
+            if anchor:
+                # anchored, so clips with the same relative paths in different places stay apart
+                first = os.path.normpath(self.anchors.anchor(anchor, first))
+                last = os.path.normpath(self.anchors.anchor(anchor, last))
+            nodeName = clip_sequence_name(first, last)
+            
+            if not self.graph.has_node(nodeName):
+                info = {}
+                # not known until validateClips has been through the frames
+                info['online'] = None
+                info['path'] = nodeName
+                info['type'] = 'clip'
+                info['frames'] = len(paths)
+                
+                self.graph.add_node(nodeName, info)
+                self.clip_frames[nodeName] = []
+            self.clip_frames[nodeName].append((anchor, paths))
+            
+            layer = anchor_path
+            if not layer:
+                # fall back on the manifest. not really correct, but it'll have to do
+                manifest = clip_info.get('manifestAssetPath')
+                layer = manifest.resolvedPath if manifest else ''
+            self.primArc(layer, nodeName, 'clip')
+    
+    
+    def validateClips(self, callback=None):
+        """
+        Check every frame of every clip sequence for missing files, on a background thread.
+        When a sequence is done its node info gets 'online', 'frames', 'missing' (a count) and
+        'missing_frames' (frame ranges, eg '1001-1010, 1050'), and callback is called with the
+        node path and info - from the background thread.
+        
+        :param callback: function(node path, info)
+        :return: the running threading.Thread. join it to wait for the results
+        """
+        sequences = list(self.clip_frames.items())
+        # the walker can be reused for a reload while this is still going, which replaces all of these.
+        # the results belong to this walk's graph
+        graph, exists, anchors = self.graph, self.exists, self.anchors
+        
+        def check():
+            for nodeName, sources in sequences:
+                frames = []
+                seen = set()
+                for anchor, paths in sources:
+                    for path in paths:
+                        if anchor:
+                            path = anchors.anchor(anchor, path)
+                        if not path in seen:
+                            seen.add(path)
+                            frames.append(path)
+                
+                # one directory listing for the whole sequence, rather than a stat per frame
+                missing = exists.missing(frames)
+                
+                info = graph.node(nodeName)
+                info['frames'] = len(frames)
+                info['missing'] = len(missing)
+                info['missing_frames'] = utils.frame_ranges([clip_frame_number(path) for path in missing])
+                info['online'] = not missing
+                if missing:
+                    logger.info('{}: {} of {} frames missing ({})'.format(nodeName, len(missing), len(frames),
+                                                                          info['missing_frames']))
+                if callback:
+                    callback(nodeName, info)
+        
+        thread = threading.Thread(target=check, name='validateClips')
+        thread.daemon = True
+        thread.start()
+        return thread
+    
+    
+    def layerprops(self, layer):
+        print 'layer props'.center(40, '-')
+        
+        for prop in ['anonymous', 'colorConfiguration', 'colorManagementSystem', 'comment', 'customLayerData',
+                     'defaultPrim', 'dirty', 'documentation', 'empty', 'endTimeCode', 'expired', 'externalReferences',
+                     'fileExtension', 'framePrecision',
+                     'framesPerSecond', 'hasOwnedSubLayers', 'identifier', 'owner', 'permissionToEdit',
+                     'permissionToSave', 'pseudoRoot', 'realPath', 'repositoryPath', 'rootPrimOrder', 'rootPrims',
+                     'sessionOwner', 'startTimeCode', 'subLayerOffsets', 'subLayerPaths', 'timeCodesPerSecond',
+                     'version']:
+            print prop, getattr(layer, prop)
+        print ''.center(40, '-')
+        
+        defaultprim = layer.defaultPrim
+        if defaultprim:
+            print defaultprim, type(defaultprim)
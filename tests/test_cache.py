@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dependency_graph'))
+
+import cache
+
+
+def put_and_hold(cache_path, layer_path, written, release):
+    # a walk that's put something in the cache and is still going
+    arc_cache = cache.ArcCache(cache_path)
+    arc_cache.put(layer_path, 'layers', [[layer_path, 'a.usda', 'sublayer']])
+    written.set()
+    release.wait(30)
+    arc_cache.close()
+
+
+def put(cache_path, layer_path, results):
+    try:
+        arc_cache = cache.ArcCache(cache_path, timeout=2)
+        arc_cache.put(layer_path, 'layers', [[layer_path, 'b.usda', 'reference']])
+        arc_cache.close()
+        results.put(None)
+    except Exception as e:
+        results.put(str(e))
+
+
+class ArcCacheProcessesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, 'arcs.sqlite')
+        self.layers = []
+        for name in ['a.usda', 'b.usda']:
+            path = os.path.join(self.tmp, name)
+            with open(path, 'w') as fp:
+                fp.write('#usda 1.0\n')
+            self.layers.append(path)
+    
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    
+    def test_two_processes_write(self):
+        written = multiprocessing.Event()
+        release = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        
+        holder = multiprocessing.Process(target=put_and_hold, args=(self.cache_path, self.layers[0], written, release))
+        holder.start()
+        try:
+            self.assertTrue(written.wait(10))
+            writer = multiprocessing.Process(target=put, args=(self.cache_path, self.layers[1], results))
+            writer.start()
+            writer.join(10)
+            # the second process mustn't be locked out while the first is still walking
+            self.assertIsNone(results.get(timeout=1))
+        finally:
+            release.set()
+            holder.join(10)
+        
+        arc_cache = cache.ArcCache(self.cache_path)
+        self.assertEqual(arc_cache.get(self.layers[0], 'layers'), [[self.layers[0], 'a.usda', 'sublayer']])
+        self.assertEqual(arc_cache.get(self.layers[1], 'layers'), [[self.layers[1], 'b.usda', 'reference']])
+        arc_cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
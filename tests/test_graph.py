@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dependency_graph'))
+
+from graph import DependencyGraph
+
+
+class RemoveTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph()
+        for path in ['shot.usd', 'set.usd', 'tree.usd']:
+            self.graph.add_node(path, {})
+        self.graph.add_edge('shot.usd', 'set.usd', 'sublayer')
+        self.graph.add_edge('set.usd', 'tree.usd', 'reference')
+        self.graph.add_edge('shot.usd', 'tree.usd', 'reference')
+    
+    
+    def test_remove_edge(self):
+        mark = self.graph.added_since()[2]
+        self.assertTrue(self.graph.remove_edge('set.usd', 'tree.usd', 'reference'))
+        self.assertFalse(self.graph.remove_edge('set.usd', 'tree.usd', 'reference'))
+        self.assertEqual(self.graph.out_edges('set.usd'), [])
+        self.assertEqual(self.graph.in_edges('tree.usd'), [('shot.usd', 'tree.usd', 'reference')])
+        self.assertEqual(self.graph.edge_count(), 2)
+        
+        self.graph.add_edge('set.usd', 'tree.usd', 'payload')
+        nodes, edges, mark = self.graph.added_since(mark)
+        self.assertEqual(edges, [('set.usd', 'tree.usd', 'payload', {})])
+    
+    
+    def test_remove_node(self):
+        self.assertTrue(self.graph.remove_node('set.usd'))
+        self.assertFalse(self.graph.has_node('set.usd'))
+        self.assertEqual(len(self.graph), 2)
+        self.assertEqual(list(self.graph.edges()), [('shot.usd', 'tree.usd', 'reference')])
+        self.assertEqual(self.graph.in_edges('tree.usd'), [('shot.usd', 'tree.usd', 'reference')])
+        # the edges that were removed with it don't come out in a batch either
+        nodes, edges, mark = self.graph.added_since()
+        self.assertEqual([path for path, info in nodes], ['shot.usd', 'tree.usd'])
+        self.assertEqual(len(edges), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
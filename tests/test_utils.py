@@ -0,0 +1,63 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dependency_graph'))
+
+import utils
+
+
+class FileExistenceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.tmp, 'assets'))
+        for name in ['shot.usda', os.path.join('assets', 'tree.usda')]:
+            with open(os.path.join(self.tmp, name), 'w') as fp:
+                fp.write('#usda 1.0\n')
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+    
+    
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+    
+    
+    def test_absolute(self):
+        exists = utils.FileExistence()
+        self.assertTrue(exists.isfile(os.path.join(self.tmp, 'shot.usda')))
+        self.assertTrue(exists.isfile(os.path.join(self.tmp, 'assets', 'tree.usda')))
+        self.assertFalse(exists.isfile(os.path.join(self.tmp, 'assets', 'rock.usda')))
+    
+    
+    def test_relative(self):
+        exists = utils.FileExistence()
+        self.assertTrue(exists.isfile('shot.usda'))
+        self.assertTrue(exists.isfile(os.path.join('assets', 'tree.usda')))
+        self.assertTrue(exists.isfile(os.path.join('assets', '..', 'shot.usda')))
+        self.assertFalse(exists.isfile('nothere.usda'))
+        # relative and absolute paths share the same listing
+        self.assertTrue(exists.isfile(os.path.join(self.tmp, 'shot.usda')))
+        self.assertEqual(exists.listings, 2)
+    
+    
+    def test_missing_directory(self):
+        exists = utils.FileExistence()
+        self.assertFalse(exists.isfile(os.path.join(self.tmp, 'nothere', 'model.usda')))
+        self.assertFalse(exists.isfile(os.path.join('nothere', 'model.usda')))
+        self.assertFalse(exists.isfile(''))
+        if utils.scandir is not None:
+            # directories aren't files. without scandir they can't be told apart
+            self.assertFalse(exists.isfile('assets'))
+    
+    
+    def test_missing(self):
+        exists = utils.FileExistence()
+        paths = ['shot.usda', 'nothere.usda', os.path.join('assets', 'tree.usda'), os.path.join('gone', 'a.usda')]
+        self.assertEqual(exists.missing(paths), ['nothere.usda', os.path.join('gone', 'a.usda')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dependency_graph'))
+
+try:
+    import walker
+except (ImportError, SyntaxError):
+    # needs usd, and the python 2 it's built against
+    walker = None
+
+
+@unittest.skipIf(walker is None, 'needs usd and python 2')
+class WalkStageLayersTest(unittest.TestCase):
+    def walk(self, layers, max_depth=None, workers=1):
+        """
+        :param layers: dict of layer name: names of the layers it sublayers. the first one is the root
+        :return: DependencyWalker that's walked them, without opening any files
+        """
+        def path(name):
+            return os.path.abspath(os.path.join(os.sep, 'show', name + '.usda'))
+        
+        arcs = dict((path(name), [[path(sub), sub + '.usda', 'sublayer'] for sub in subs])
+                    for name, subs in layers.items())
+        x = walker.DependencyWalker(path('r'), mode='layers', workers=workers, max_depth=max_depth)
+        x.openLayer = lambda layer_path, mode=None: arcs.get(layer_path)
+        x.start()
+        self.path = path
+        return x
+    
+    
+    def test_shorter_path_found_later(self):
+        # C is reached through A first, one too deep to expand, then through the shortcut to B
+        layers = {'r': ['a', 'b'], 'a': ['b'], 'b': ['c'], 'c': ['d'], 'd': []}
+        for workers in [1, 4]:
+            x = self.walk(layers, max_depth=3, workers=workers)
+            self.assertIn(self.path('c'), x.expanded)
+            self.assertTrue(x.graph.has_node(self.path('d')))
+            self.assertNotIn(self.path('d'), x.expanded)
+            self.assertEqual(x.layerDepths()[self.path('c')], 2)
+    
+    
+    def test_depth_limit(self):
+        x = self.walk({'r': ['a'], 'a': ['b'], 'b': ['c'], 'c': []}, max_depth=2)
+        self.assertEqual(x.expanded, set([self.path('r'), self.path('a')]))
+        self.assertTrue(x.graph.has_node(self.path('b')))
+        self.assertFalse(x.graph.has_node(self.path('c')))
+    
+    
+    def test_cycle(self):
+        x = self.walk({'r': ['a'], 'a': ['b'], 'b': ['a']})
+        self.assertEqual(x.cycles, [[self.path('b'), self.path('a')]])
+        self.assertTrue(x.graph.edge(self.path('b'), self.path('a'), 'sublayer').get('cycle'))
+
+
+if __name__ == '__main__':
+    unittest.main()